@@ -1,15 +1,51 @@
 import hashlib
+import math
+import os
+import shutil
+import threading
 import time
 import warnings
+import weakref
+from bisect import bisect_left, bisect_right
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from collections import OrderedDict
 from contextlib import contextmanager
-from itertools import groupby
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Union, Optional, List, Callable, NamedTuple, Iterable
+from typing import (
+    Union,
+    Optional,
+    List,
+    Callable,
+    NamedTuple,
+    Iterable,
+    Dict,
+    Any,
+    Tuple,
+    Iterator,
+    Generator,
+    Set,
+)
 
-from atomicwrites import atomic_write
 from sortedcontainers import SortedDict
 
+from dynafile.bloom import BloomFilter, BloomInfo, BloomStats
+from dynafile.cache import CacheInfo, PartitionCache, file_signature, path_signature
+from dynafile import compression as _compression
+from dynafile.codec import Codec, MappedCodec, MappedTree, PickleCodec, RecordCodec
+from dynafile.compression import Compression
 from dynafile.dispatcher import Dispatcher, Event, EventListener
+from dynafile.durability import Durability
+from dynafile.lock import partition_lock
+from dynafile.stream import StreamRecord, append_events, read_events
+from dynafile.ttl import expiry_of, load_expiry, min_expiry, save_expiry
+from dynafile.wal import Record, append_records, read_records
 
 Filter = Union[Callable[[dict], bool], "str"]
 
@@ -22,126 +58,1110 @@ class ActionType:
 class Action(NamedTuple):
     op: ActionType
     data: dict  # contains only key attributes for DELETE calls or the whole item in case of PUT calls
+    # has to match the existing item, see `ConditionalCheckFailed`
+    condition: Optional[Filter] = None
+
+
+class _KeyRange(NamedTuple):
+    """Sort key range, `None` is unbounded"""
+
+    minimum: Any = None
+    maximum: Any = None
+    inclusive: Tuple[bool, bool] = (True, True)
+
+    @staticmethod
+    def of(
+        begins_with=None,
+        between: Optional[Tuple[Any, Any]] = None,
+        lt=None,
+        lte=None,
+        gt=None,
+        gte=None,
+        reverse: bool = False,
+        start=None,
+    ) -> "_KeyRange":
+        """
+        Combines key conditions into the tightest range
+
+        `start` bounds the range in iteration direction given by `reverse`.
+        """
+        # bounds as (value, inclusive)
+        lower = []
+        upper = []
+
+        if start is not None:
+            (upper if reverse else lower).append((start, True))
+        if begins_with:
+            lower.append((begins_with, True))
+            successor = _prefix_successor(begins_with)
+            if successor is not None:
+                upper.append((successor, False))
+        if between is not None:
+            lower.append((between[0], True))
+            upper.append((between[1], True))
+        if gt is not None:
+            lower.append((gt, False))
+        if gte is not None:
+            lower.append((gte, True))
+        if lt is not None:
+            upper.append((lt, False))
+        if lte is not None:
+            upper.append((lte, True))
+
+        return _KeyRange._of_bounds(lower, upper)
+
+    @staticmethod
+    def _of_bounds(lower: List[Tuple[Any, bool]], upper: List[Tuple[Any, bool]]):
+        # on equal values the exclusive bound is the tighter one
+        minimum, min_inclusive = (
+            max(lower, key=lambda b: (b[0], not b[1])) if lower else (None, True)
+        )
+        maximum, max_inclusive = (
+            min(upper, key=lambda b: (b[0], b[1])) if upper else (None, True)
+        )
+        return _KeyRange(minimum, maximum, (min_inclusive, max_inclusive))
+
+    def after(self, key, reverse: bool) -> "_KeyRange":
+        """Narrows the range to keys after `key`, in iteration direction given by `reverse`"""
+        lower = [] if self.minimum is None else [(self.minimum, self.inclusive[0])]
+        upper = [] if self.maximum is None else [(self.maximum, self.inclusive[1])]
+        (upper if reverse else lower).append((key, False))
+        return _KeyRange._of_bounds(lower, upper)
+
+    def composite(self) -> "_KeyRange":
+        """Applies the range to the first element of composite keys `(value, ...)`"""
+        minimum = maximum = None
+        if self.minimum is not None:
+            minimum = (self.minimum,) if self.inclusive[0] else (self.minimum, _TOP)
+        if self.maximum is not None:
+            maximum = (self.maximum, _TOP) if self.inclusive[1] else (self.maximum,)
+        return _KeyRange(minimum, maximum)
+
+    def irange(self, tree: SortedDict, reverse: bool) -> Iterable:
+        return tree.irange(
+            minimum=self.minimum,
+            maximum=self.maximum,
+            inclusive=self.inclusive,
+            reverse=reverse,
+        )
+
+    def values(self, tree: Union[SortedDict, MappedTree], reverse: bool) -> Iterable:
+        if isinstance(tree, MappedTree):
+            return tree.irange_values(
+                minimum=self.minimum,
+                maximum=self.maximum,
+                inclusive=self.inclusive,
+                reverse=reverse,
+            )
+        return map(tree.__getitem__, self.irange(tree, reverse))
+
+
+class _Top:
+    """Greater than any other value"""
+
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return self is other
+
+    def __gt__(self, other):
+        return self is not other
+
+    def __ge__(self, other):
+        return True
+
+    def __repr__(self):
+        return "_TOP"
+
+
+_TOP = _Top()
+
+
+def _writable(tree, cache: Optional[PartitionCache]) -> SortedDict:
+    """Tree to modify, copies read only trees and trees pinned by readers"""
+    if not isinstance(tree, SortedDict) or (cache and cache.pinned(tree)):
+        return tree.copy()
+    return tree
+
+
+def _prefix_successor(prefix: Union[str, bytes]):
+    """Smallest value greater than all values starting with `prefix`, `None` if there is none"""
+    if isinstance(prefix, str):
+        stripped = prefix.rstrip(chr(0x10FFFF))
+        if not stripped:
+            return None
+        return stripped[:-1] + chr(ord(stripped[-1]) + 1)
+    elif isinstance(prefix, bytes):
+        stripped = prefix.rstrip(b"\xff")
+        if not stripped:
+            return None
+        return stripped[:-1] + bytes([stripped[-1] + 1])
+    else:
+        raise TypeError(f"begins_with requires str or bytes, got {type(prefix)}")
+
+
+class QueryResult(Iterator[dict]):
+    """
+    Items returned by `query` and `scan`.
+
+    Once the iteration stopped because of `limit`, `last_evaluated_key` contains the key to continue from.
+    """
+
+    def __init__(self, items: Generator[dict, None, Optional[dict]]):
+        self._items = items
+        self.last_evaluated_key: Optional[dict] = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> dict:
+        try:
+            return next(self._items)
+        except StopIteration as e:
+            self.last_evaluated_key = e.value
+            raise
+
+
+def _add(current, value, attribute: str):
+    """Adds a number or merges a set into the current value of an attribute"""
+    if current is None:
+        return value
+    if isinstance(value, (set, frozenset)) and isinstance(current, (set, frozenset)):
+        return current | value
+    if (
+        isinstance(value, (int, float))
+        and isinstance(current, (int, float))
+        and not isinstance(value, bool)
+        and not isinstance(current, bool)
+    ):
+        return current + value
+    raise TypeError(
+        f"Can not add {type(value).__name__} to {type(current).__name__} of attribute {attribute}"
+    )
+
+
+def _check_limit(limit: Optional[int]):
+    if limit is not None and limit < 1:
+        raise ValueError("limit has to be at least 1")
+
+
+def _check_segment(segment: Optional[int], total_segments: Optional[int]):
+    if segment is None and total_segments is None:
+        return
+    if segment is None or total_segments is None:
+        raise ValueError("segment and total_segments have to be given together")
+    if not 0 <= segment < total_segments:
+        raise ValueError("segment has to be between 0 and total_segments - 1")
+
+
+def _segment_of(partition_hash: str, total_segments: int) -> int:
+    """Segments are consecutive ranges of the partition hash space"""
+    return int(partition_hash[:8], 16) * total_segments >> 32
+
+
+class GlobalSecondaryIndex(NamedTuple):
+    """
+    Global secondary index, items are stored a second time under the index keys.
+
+    Items missing one of the index key attributes or with `None` values are not indexed.
+    Index partition keys have to be strings, writes of items with other values raise a `ValueError`.
+    """
+
+    name: str
+    pk_attribute: str
+    sk_attribute: Optional[str] = None
+
+
+class LocalSecondaryIndex(NamedTuple):
+    """
+    Local secondary index, orders the items of each partition by another attribute.
+
+    Items missing the index sort key attribute are not indexed.
+    """
+
+    name: str
+    sk_attribute: str
+
+
+class _Change(NamedTuple):
+    op: str
+    key: Any
+    new: Optional[dict]
+    old: Optional[dict]
+
+
+class BatchResult(NamedTuple):
+    """
+    Summary of an executed batch
+
+    `coalesced` counts actions dropped, because a later action targets the same item.
+    """
+
+    partitions: int
+    actions: int
+    coalesced: int
+
+
+class UpdateResult(NamedTuple):
+    old: Optional[dict]  # `None` if the item was created
+    new: dict
+
+
+class ConditionalCheckFailed(Exception):
+    """Raised if the condition of a write does not match the existing item, nothing is written"""
+
+    def __init__(self, item: Optional[dict]):
+        super().__init__("The conditional request failed")
+        self.item = item  # existing item, `None` if missing
+
+
+class BatchWriteError(Exception):
+    """Raised if a batch failed for some partitions, other partitions are written nevertheless"""
+
+    def __init__(self, errors: Dict[Any, BaseException]):
+        super().__init__(f"Batch write failed for {len(errors)} partition(s)")
+        self.errors = errors  # by partition key
+
+
+class _Segment:
+    """
+    Sort key range of a partition, backed by a file.
+
+    Changes are stored either as a full snapshot (`<name>.pickle`) or, in log mode, appended to `<name>.log`.
+    Reads replay the log over the snapshot, the log is folded into the snapshot once it exceeds its thresholds.
+
+    With bloom filters enabled, `<name>.bloom` contains a filter of the keys in snapshot and log.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        name: str,
+        codec: Codec,
+        compression: Optional[Compression] = None,
+        cache: Optional[PartitionCache] = None,
+        write_log: bool = False,
+        log_max_records: int = 1000,
+        log_max_bytes: int = 4 * 1024 * 1024,
+        bloom_stats: Optional[BloomStats] = None,
+        durability: Optional[Durability] = None,
+    ):
+        self.name = name
+        self._file = path / f"{name}.pickle"
+        self._log = path / f"{name}.log"
+        self._bloom_file = path / f"{name}.bloom"
+
+        self._codec = codec
+        self._compression = compression
+        self._cache = cache
+        self._durability = durability or Durability()
+
+        self._bloom_stats = bloom_stats
+        self._bloom: Optional[BloomFilter] = None
+
+        self._write_log = write_log
+        self._log_max_records = log_max_records
+        self._log_max_bytes = log_max_bytes
+        self._log_records = 0
+
+    def _signature(self):
+        data = path_signature(self._file)
+        log = path_signature(self._log)
+        if data is None and log is None:
+            return None
+        return data, log
+
+    def size(self) -> int:
+        """Size of the segment files"""
+        signature = self._signature()
+        if signature is None:
+            return 0
+        return sum(s[1] for s in signature if s is not None)
+
+    def _load(self) -> SortedDict:
+        if self._cache:
+            signature = self._signature()
+            if signature is None:
+                self._log_records = 0
+                return SortedDict()
+
+            cached = self._cache.get(self._file, signature)
+            if cached is not None:
+                tree, self._log_records = cached
+                return tree
+
+        tree = SortedDict()
+        data_signature = log_signature = None
+        nbytes = 0
+
+        # signatures of the opened files, match the loaded content even if the files were replaced meanwhile
+        try:
+            file = self._file.open("rb")
+        except FileNotFoundError:
+            pass
+        else:
+            with file:
+                tree = _compression.load(self._codec, file)
+                stat = os.fstat(file.fileno())
+                data_signature = file_signature(stat)
+                nbytes += stat.st_size
+
+        self._log_records = 0
+        try:
+            file = self._log.open("rb")
+        except FileNotFoundError:
+            pass
+        else:
+            with file:
+                records, complete = read_records(file)
+                stat = os.fstat(file.fileno())
+                log_signature = file_signature(stat)
+                nbytes += stat.st_size
+
+            if records:
+                tree = _writable(tree, None)
+            for record in records:
+                _Segment._replay(tree, record)
+            self._log_records = len(records)
+
+            if not complete:
+                warnings.warn(f"Incomplete record at the end of {self._log} ignored")
+                # enforce compaction on next write, appending after an incomplete record is not readable
+                self._log_records = self._log_max_records
+
+        if self._cache and (data_signature or log_signature):
+            self._cache.put(
+                self._file,
+                (data_signature, log_signature),
+                (tree, self._log_records),
+                len(tree),
+                nbytes,
+            )
+        return tree
+
+    @staticmethod
+    def _replay(tree: SortedDict, record: Record):
+        op, key, item = record
+        if op == ActionType.PUT:
+            tree[key] = item
+        elif op == ActionType.DELETE:
+            tree.pop(key, None)
+
+    def _save(self, data: SortedDict):
+        """Write a full snapshot, which replaces the log"""
+        self._file.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._durability.atomic_write(self._file) as file:
+            _compression.dump(self._codec, data, file, self._compression)
+            file.flush()
+            stat = os.fstat(file.fileno())
+
+        self._log.unlink(missing_ok=True)
+        self._log_records = 0
+
+        signature = (file_signature(stat), None)
+        if self._bloom_stats:
+            self._save_bloom(
+                BloomFilter.build(
+                    signature, data.keys(), len(data), self._bloom_stats.bits_per_key
+                )
+            )
+
+        if self._cache:
+            self._cache.put(
+                self._file,
+                signature,
+                (data, 0),
+                len(data),
+                stat.st_size,
+            )
+
+    def _append(self, data: SortedDict, changes: List[_Change]):
+        """Append changes to the log, `data` has to contain the changes already"""
+        self._log.parent.mkdir(parents=True, exist_ok=True)
+
+        bloom = None
+        if self._bloom_stats:
+            bloom = self._load_bloom(self._signature())
+
+        stat = append_records(
+            self._log, [(c.op, c.key, c.new) for c in changes], self._durability
+        )
+        self._log_records += len(changes)
+
+        data_signature = path_signature(self._file)
+        signature = (data_signature, file_signature(stat))
+        if self._bloom_stats:
+            # extend the filter of the previous version, deleted keys remain
+            if bloom is not None:
+                bloom = bloom.copy(signature)
+                added = [bloom.add(c.key) for c in changes if c.op == ActionType.PUT]
+                if not all(added):
+                    bloom = None
+            else:
+                bloom = BloomFilter.build(
+                    signature, data.keys(), len(data), self._bloom_stats.bits_per_key
+                )
+            self._save_bloom(bloom)
+
+        if self._cache:
+            nbytes = stat.st_size + (data_signature[1] if data_signature else 0)
+            self._cache.put(
+                self._file,
+                signature,
+                (data, self._log_records),
+                len(data),
+                nbytes,
+            )
+
+    def _load_bloom(self, signature) -> Optional[BloomFilter]:
+        """Bloom filter of the given version of the segment, `None` if there is none"""
+        bloom = self._bloom
+        if bloom is None or bloom.signature != signature:
+            try:
+                bloom = BloomFilter.loads(self._bloom_file.read_bytes())
+            except FileNotFoundError:
+                return None
+            self._bloom = bloom
+
+        return bloom if bloom.signature == signature else None
+
+    def _save_bloom(self, bloom: Optional[BloomFilter]):
+        self._bloom = bloom
+        if bloom is None:
+            # filter not supported for the keys
+            self._bloom_file.unlink(missing_ok=True)
+            return
+
+        with self._durability.atomic_write(self._bloom_file) as file:
+            file.write(bloom.dumps())
+
+    def might_contain(self, key) -> Optional[bool]:
+        """`False` if the key is definitely not contained, `None` if no bloom filter is available"""
+        if not self._bloom_stats:
+            return None
+
+        signature = self._signature()
+        if signature is None:
+            return None
+
+        bloom = self._load_bloom(signature)
+        if bloom is None:
+            return None
+
+        contained = bloom.might_contain(key)
+        self._bloom_stats.checked(contained)
+        return contained
+
+    def _compaction_due(self, changes: List[_Change]) -> bool:
+        if self._log_records + len(changes) >= self._log_max_records:
+            return True
+
+        log_signature = path_signature(self._log)
+        return log_signature is not None and log_signature[1] >= self._log_max_bytes
+
+    def store(self, data: SortedDict, changes: List[_Change]):
+        """Persist `data`, which contains the given changes already"""
+        if self._write_log and not self._compaction_due(changes):
+            self._append(data, changes)
+        else:
+            self._save(data)
+
+    def invalidate(self):
+        if self._cache:
+            self._cache.invalidate(self._file)
+
+    def remove(self):
+        self._file.unlink(missing_ok=True)
+        self._log.unlink(missing_ok=True)
+        self._bloom_file.unlink(missing_ok=True)
+        self.invalidate()
+
+
+# lower bounds of all segments but the first, names of the segments
+_Manifest = Tuple[List[Any], List[str]]
+
+
+class _PartitionView:
+    """
+    Segments of a partition, loaded within a single access.
+
+    Segments are loaded on first access of one of their keys.
+    """
+
+    def __init__(
+        self, partition: "_Partition", manifest: _Manifest, copy_on_write=False
+    ):
+        self.bounds, self.names = manifest
+        self.trees: Dict[str, SortedDict] = {}
+        # local secondary index tree loaded with the segments
+        self.index: Optional[SortedDict] = None
+
+        self._partition = partition
+        self._copy_on_write = copy_on_write
+
+    def segment_of(self, key) -> str:
+        return self.names[bisect_right(self.bounds, key)]
+
+    def tree(self, name: str) -> SortedDict:
+        tree = self.trees.get(name)
+        if tree is None:
+            tree = self._partition._segment(name)._load()
+            if self._copy_on_write:
+                # readers iterate the cached tree, copy on write
+                tree = _writable(tree, self._partition._cache)
+            self.trees[name] = tree
+        return tree
+
+    def load(self, key_range: _KeyRange):
+        """Loads all segments overlapping the key range"""
+        first = 0
+        if key_range.minimum is not None:
+            first = bisect_right(self.bounds, key_range.minimum)
+        last = len(self.bounds)
+        if key_range.maximum is not None:
+            last = bisect_right(self.bounds, key_range.maximum)
+
+        for name in self.names[first : last + 1]:
+            self.tree(name)
+
+    def items(self) -> Iterator[Tuple[Any, dict]]:
+        for name in self.names:
+            yield from self.tree(name).items()
+
+    def irange(self, key_range: _KeyRange, reverse: bool) -> Iterator[dict]:
+        """Items of the key range, only loaded segments are considered"""
+        names = [name for name in self.names if name in self.trees]
+        for name in reversed(names) if reverse else names:
+            yield from key_range.values(self.trees[name], reverse=reverse)
+
+    def get(self, key, default=None):
+        return self.tree(self.segment_of(key)).get(key, default)
+
+    def pop(self, key, default=None):
+        return self.tree(self.segment_of(key)).pop(key, default)
+
+    def __setitem__(self, key, item):
+        self.tree(self.segment_of(key))[key] = item
 
 
 class _Partition:
     """
-    Partition represents a storage node backed by a file.
+    Partition represents a storage node backed by files.
 
     All items in one partition need to have the same partition key, which is not enforced within the partition.
     Partition organizes items only by the sort key attribute.
+
+    Items are stored in segments by sort key range. Partitions start with a single segment (`data`),
+    segments exceeding the split thresholds are split into segments filled up to half of the thresholds. The segments of a split partition are listed
+    in `manifest.pickle`, which is replaced atomically. Writes only store the segments containing changed items.
+
+    Local secondary indexes are stored next to the data as `sli-<name>.pickle`, mapping `(attribute value, sort key)`
+    to the sort key. They are removed before the data is written and rewritten afterwards,
+    a missing index file is rebuilt from the data.
+
+    Events of saved changes are appended to `stream.log`, if the stream log is enabled, see `dynafile.stream`.
+
+    With a TTL attribute, a lower bound of the expiry times of the items is recorded in `expiry.json`, see `dynafile.ttl`.
+
+    Access is guarded by a partition lock, which allows parallel readers or a single writer across threads and processes.
     """
 
     def __init__(
-        self, path: Path, sk_attribute: str, dispatcher: Optional[Dispatcher] = None
+        self,
+        path: Path,
+        sk_attribute: str,
+        dispatcher: Optional[Dispatcher] = None,
+        cache: Optional[PartitionCache] = None,
+        write_log: bool = False,
+        log_max_records: int = 1000,
+        log_max_bytes: int = 4 * 1024 * 1024,
+        sort_key: Optional[Callable[[dict], Any]] = None,
+        indexes: Iterable["_IndexTable"] = (),
+        local_indexes: Iterable[LocalSecondaryIndex] = (),
+        split_max_items: Optional[int] = None,
+        split_max_bytes: Optional[int] = None,
+        codec: Optional[Codec] = None,
+        compression: Optional[Compression] = None,
+        bloom_stats: Optional[BloomStats] = None,
+        ttl_attribute: Optional[str] = None,
+        stream_log: bool = False,
+        durability: Optional[Durability] = None,
     ):
+        self._path = path
         self._sk_attribute = sk_attribute
-        self._file = path / "data.pickle"
+        self._ttl_attribute = ttl_attribute
+        self._sort_key = sort_key or (lambda item: item.get(sk_attribute))
+        self._indexes = list(indexes)
+        self._local_indexes = list(local_indexes)
+        self._manifest = path / "manifest.pickle"
+        self._expiry = path / "expiry.json"
+        self._stream_log = path / "stream.log" if stream_log else None
+        self._lock = partition_lock(path)
 
         self._dispatcher = dispatcher
+        self._cache = cache
+        self._codec = codec or PickleCodec()
+        self._compression = compression
+        self._bloom_stats = bloom_stats
+        self._durability = durability or Durability()
+
+        self._write_log = write_log
+        self._log_max_records = log_max_records
+        self._log_max_bytes = log_max_bytes
+
+        self._split_max_items = split_max_items
+        self._split_max_bytes = split_max_bytes
+
+        self._segments: Dict[str, _Segment] = {}
+        # signature and content of the last loaded manifest
+        self._loaded_manifest: Optional[Tuple[Any, _Manifest]] = None
+
+        # changes of the current write access
+        self._changes: Optional[List[_Change]] = None
+        # exact expiry bound determined within the current write access
+        self._expires: Optional[float] = None
+
+    def _segment(self, name: str) -> _Segment:
+        segment = self._segments.get(name)
+        if segment is None:
+            segment = self._segments.setdefault(
+                name,
+                _Segment(
+                    self._path,
+                    name,
+                    codec=self._codec,
+                    compression=self._compression,
+                    cache=self._cache,
+                    write_log=self._write_log,
+                    log_max_records=self._log_max_records,
+                    log_max_bytes=self._log_max_bytes,
+                    bloom_stats=self._bloom_stats,
+                    durability=self._durability,
+                ),
+            )
+        return segment
 
-    def _load(self) -> SortedDict:
-        # TODO not thread save
+    def _load_manifest(self) -> _Manifest:
         import pickle
 
-        if self._file.exists():
-            with self._file.open("rb") as file:
-                return pickle.load(file)
-        else:
-            return SortedDict()
+        try:
+            file = self._manifest.open("rb")
+        except FileNotFoundError:
+            return [], ["data"]
 
-    def _save(self, data: SortedDict):
-        # TODO not thread save
+        with file:
+            signature = file_signature(os.fstat(file.fileno()))
+            loaded = self._loaded_manifest
+            if loaded is not None and loaded[0] == signature:
+                return loaded[1]
+
+            manifest = pickle.load(file)
+
+        self._loaded_manifest = signature, manifest
+        return manifest
+
+    def _save_manifest(self, manifest: _Manifest):
         import pickle
 
-        self._file.parent.mkdir(parents=True, exist_ok=True)
+        with self._durability.atomic_write(self._manifest) as file:
+            pickle.dump(manifest, file)
+
+    def _split_parts(self, segment: _Segment, tree: SortedDict) -> int:
+        """Number of segments to split a segment into, each filled up to half of the thresholds"""
+        parts = 1
+        if self._split_max_items is not None and len(tree) > self._split_max_items:
+            parts = max(parts, -(-len(tree) * 2 // self._split_max_items))
+        if self._split_max_bytes is not None:
+            size = segment.size()
+            if size > self._split_max_bytes:
+                parts = max(parts, -(-size * 2 // self._split_max_bytes))
+        return min(parts, len(tree))
+
+    def _index_file(self, index: LocalSecondaryIndex) -> Path:
+        return self._path / f"sli-{index.name}.pickle"
+
+    def _load_index(
+        self, index: LocalSecondaryIndex, view: _PartitionView
+    ) -> SortedDict:
+        """Loads a local secondary index, builds it from all segments if the index file is missing"""
+        path = self._index_file(index)
+        try:
+            file = path.open("rb")
+        except FileNotFoundError:
+            return _Partition._build_index(index, view)
+
+        with file:
+            signature = file_signature(os.fstat(file.fileno()))
+            if self._cache:
+                cached = self._cache.get(path, signature)
+                if cached is not None:
+                    return cached
+
+            index_tree = _compression.load(self._codec, file)
+
+        if self._cache:
+            self._cache.put(path, signature, index_tree, len(index_tree), signature[1])
+        return index_tree
 
-        with atomic_write(self._file, mode="wb", overwrite=True) as file:
-            pickle.dump(data, file)
+    @staticmethod
+    def _build_index(index: LocalSecondaryIndex, view: _PartitionView) -> SortedDict:
+        return SortedDict(
+            ((item[index.sk_attribute], key), key)
+            for key, item in view.items()
+            if index.sk_attribute in item
+        )
+
+    @staticmethod
+    def _update_index(
+        index: LocalSecondaryIndex, index_tree: SortedDict, changes: List[_Change]
+    ):
+        # idempotent, changes may already be contained in an index built from the data
+        attribute = index.sk_attribute
+        for change in changes:
+            if change.old is not None and attribute in change.old:
+                index_tree.pop((change.old[attribute], change.key), None)
+            if change.new is not None and attribute in change.new:
+                index_tree[(change.new[attribute], change.key)] = change.key
+
+    def _save_index(self, index: LocalSecondaryIndex, index_tree: SortedDict):
+        file = self._index_file(index)
+        with self._durability.atomic_write(file) as f:
+            _compression.dump(self._codec, index_tree, f, self._compression)
+            f.flush()
+            stat = os.fstat(f.fileno())
+
+        if self._cache:
+            self._cache.put(
+                file, file_signature(stat), index_tree, len(index_tree), stat.st_size
+            )
 
     @contextmanager
-    def write_access(self) -> SortedDict:
-        # TODO write lock
-        tree = self._load()
-        yield tree
-        self._save(tree)
-        # TODO unlock
+    def write_access(self) -> _PartitionView:
+        changes: List[_Change] = []
+        try:
+            with self._lock.write():
+                view = _PartitionView(self, self._load_manifest(), copy_on_write=True)
+
+                self._changes = []
+                self._expires = None
+                try:
+                    yield view
+                    changes = self._changes
+                    if changes:
+                        self._store(view, changes)
+                    if self._ttl_attribute:
+                        self._store_expiry(view, changes)
+                except BaseException:
+                    if self._changes:
+                        # cached trees might be modified partially
+                        for name in view.trees:
+                            self._segment(name).invalidate()
+                        if self._cache:
+                            for index in self._local_indexes:
+                                self._cache.invalidate(self._index_file(index))
+                    raise
+                finally:
+                    self._changes = None
+
+                # update indexes and schedule events while holding the lock, to keep the order of changes
+                try:
+                    for index in self._indexes:
+                        index.apply(changes)
+                finally:
+                    # changes are saved, even if updating an index failed
+                    if changes:
+                        events = [
+                            Event(action=c.op, new=c.new, old=c.old) for c in changes
+                        ]
+                        if self._stream_log:
+                            append_events(self._stream_log, events, self._durability)
+                        if self._dispatcher:
+                            self._dispatcher.schedule(events)
+        finally:
+            # listeners are called without the lock, they may access the partition
+            if changes and self._dispatcher:
+                self._dispatcher.emit_scheduled()
+
+    def _store(self, view: _PartitionView, changes: List[_Change]):
+        index_trees = []
+        for index in self._local_indexes:
+            index_tree = _writable(self._load_index(index, view), self._cache)
+
+            # a missing index is rebuilt, if writing the data succeeds but writing the index does not
+            self._index_file(index).unlink(missing_ok=True)
+            _Partition._update_index(index, index_tree, changes)
+            index_trees.append(index_tree)
+
+        per_segment: Dict[str, List[_Change]] = {}
+        for change in changes:
+            per_segment.setdefault(view.segment_of(change.key), []).append(change)
+
+        bounds, names = list(view.bounds), list(view.names)
+        split = []
+        for name, segment_changes in per_segment.items():
+            segment = self._segment(name)
+            tree = view.trees[name]
+            parts = self._split_parts(segment, tree)
+            if parts > 1:
+                self._split(segment, tree, parts, bounds, names)
+                split.append(segment)
+            else:
+                segment.store(tree, segment_changes)
+
+        if split:
+            # split segments stay valid until the manifest is replaced
+            self._save_manifest((bounds, names))
+            for segment in split:
+                segment.remove()
+                self._segments.pop(segment.name, None)
+
+        for index, index_tree in zip(self._local_indexes, index_trees):
+            self._save_index(index, index_tree)
+
+    def _store_expiry(self, view: _PartitionView, changes: List[_Change]):
+        expires = self._expires
+        if expires is None:
+            recorded = load_expiry(self._expiry)
+            if recorded is None:
+                if len(view.trees) < len(view.names):
+                    # not all items are known, the bound stays unknown
+                    return
+                expires = min_expiry(
+                    (item for _, item in view.items()), self._ttl_attribute
+                )
+            else:
+                # deletes keep the bound, which stays valid as lower bound
+                new = min_expiry(
+                    (change.new for change in changes), self._ttl_attribute
+                )
+                if new >= recorded:
+                    return
+                expires = new
+
+        save_expiry(self._expiry, expires, self._durability)
+
+    def expire_items(self, now: float) -> int:
+        """
+        Deletes expired items within a single write access, skips partitions without expired items
+
+        :return: number of deleted items
+        """
+        expires = load_expiry(self._expiry)
+        if expires is not None and expires >= now:
+            return 0
+
+        with self.write_access() as view:
+            expired = [
+                key
+                for key, item in view.items()
+                if (expiry_of(item, self._ttl_attribute) or math.inf) < now
+            ]
+            for key in expired:
+                self._delete(view, key)
+
+            self._expires = min_expiry(
+                (item for _, item in view.items()), self._ttl_attribute
+            )
+
+        return len(expired)
+
+    def _split(
+        self,
+        segment: _Segment,
+        tree: SortedDict,
+        parts: int,
+        bounds: List,
+        names: List[str],
+    ):
+        """Writes the parts of a segment to new segments and replaces it in `bounds` and `names`"""
+        starts = [len(tree) * i // parts for i in range(parts + 1)]
+
+        number = max((int(n.rpartition("-")[2]) for n in names if "-" in n), default=0)
+        new_names = [f"data-{number + i}" for i in range(1, parts + 1)]
+        for name, start, stop in zip(new_names, starts, starts[1:]):
+            keys = tree.islice(start, stop)
+            self._segment(name)._save(SortedDict((key, tree[key]) for key in keys))
+
+        position = names.index(segment.name)
+        names[position : position + 1] = new_names
+        bounds[position:position] = [tree.peekitem(start)[0] for start in starts[1:-1]]
 
     @contextmanager
-    def read_access(self) -> SortedDict:
-        # TODO read lock
-        tree = self._load()
-        # TODO unlock
-        yield tree
+    def read_access(
+        self,
+        key_range: Optional[_KeyRange] = None,
+        index: Optional[LocalSecondaryIndex] = None,
+    ) -> _PartitionView:
+        """
+        Provides a stable snapshot of the segments overlapping the key range, by default of all segments.
 
-    def add_item(self, key, item: dict):
-        with self.write_access() as tree:
-            self._put(tree, key, item)
+        The lock is only held while loading, writes during the access do not modify the snapshot.
 
-    def _put(self, tree, key, item):
-        old = tree.get(key)
-        tree[key] = item
+        :param index: local secondary index to load as `view.index`, together with all segments it refers to
+        """
+        with self._lock.read():
+            view = _PartitionView(self, self._load_manifest())
+            if index is not None:
+                view.index = self._load_index(index, view)
+                key_range = None
+            view.load(key_range or _KeyRange())
+
+            pinned = list(view.trees.values())
+            if view.index is not None:
+                pinned.append(view.index)
+            if self._cache:
+                for tree in pinned:
+                    self._cache.pin(tree)
+
+        try:
+            yield view
+        finally:
+            if self._cache:
+                for tree in pinned:
+                    self._cache.unpin(tree)
+
+    def add_item(self, key, item: dict, condition: Optional[Callable] = None):
+        with self.write_access() as view:
+            self._put(view, key, item, condition)
 
-        if self._dispatcher:
-            self._dispatcher.emit(Event(action=ActionType.PUT, new=item, old=old))
+    @staticmethod
+    def _check(old: Optional[dict], condition: Optional[Callable]):
+        if condition is not None and not condition(old):
+            raise ConditionalCheckFailed(old)
+
+    def _put(self, view: _PartitionView, key, item, condition=None):
+        # before anything is saved, indexes are updated after the partition
+        for index in self._indexes:
+            index.check(item)
+        old = view.get(key)
+        _Partition._check(old, condition)
+        # cached trees keep the stored item, later changes of the caller must not affect it
+        item = dict(item)
+        view[key] = item
+        self._changes.append(_Change(ActionType.PUT, key, item, old))
+
+    def _output(self, item: Optional[dict]) -> Optional[dict]:
+        """Items of cached trees are shared, callers receive a copy"""
+        if self._cache is None or item is None:
+            return item
+        return dict(item)
 
     def get_item(self, key) -> Optional[dict]:
-        with self.read_access() as tree:
-            return _Partition._get(tree, key)
+        return self.get_items([key])[0]
 
-    @staticmethod
-    def _get(tree, key):
-        return tree.get(key)
+    def get_items(self, keys: List) -> List[Optional[dict]]:
+        with self._lock.read():
+            view = _PartitionView(self, self._load_manifest())
+            return [self._output(self._get(view, key)) for key in keys]
 
-    def delete_item(self, key):
-        with self.write_access() as tree:
-            self._delete(tree, key)
+    def _get(self, view: _PartitionView, key) -> Optional[dict]:
+        name = view.segment_of(key)
+        if name in view.trees:
+            return view.get(key)
 
-    def _delete(self, tree, key):
-        old = tree[key]
-        del tree[key]
+        # bloom filters avoid loading segments for missing keys
+        contained = self._segment(name).might_contain(key)
+        if contained is False:
+            return None
 
-        if self._dispatcher:
-            self._dispatcher.emit(Event(action=ActionType.DELETE, new=None, old=old))
+        item = view.get(key)
+        if contained and item is None:
+            self._bloom_stats.false_positive()
+        return item
+
+    def update_item(
+        self,
+        key,
+        update: Callable[[Optional[dict]], dict],
+        condition: Optional[Callable] = None,
+    ) -> Tuple[Optional[dict], dict]:
+        """Replaces an item by `update(item)` within a single write access, `item` is `None` if missing"""
+        with self.write_access() as view:
+            old = view.get(key)
+            _Partition._check(old, condition)
+            new = update(old)
+            self._put(view, key, new)
+        return self._output(old), new
+
+    def delete_item(self, key, condition: Optional[Callable] = None):
+        with self.write_access() as view:
+            self._delete(view, key, condition)
+
+    def _delete(self, view: _PartitionView, key, condition=None):
+        if condition is not None:
+            _Partition._check(view.get(key), condition)
+        old = view.pop(key, None)
+        if old is None:
+            # deleting a missing item is a no-op
+            return
+        self._changes.append(_Change(ActionType.DELETE, key, None, old))
 
     def execute_write_batch(self, actions: List[Action]):
         """
         Provides write access within a single load/store flow.
-        :param actions: Actions to execute, supports PUT and DELETE
+
+        Nothing is written, if the condition of an action fails.
+
+        :param actions: Actions to execute, supports PUT and DELETE, conditions have to be callables
         """
-        with self.write_access() as tree:
+        with self.write_access() as view:
             for action in actions:
-                sk = action.data.get(self._sk_attribute)
+                sk = self._sort_key(action.data)
 
                 if action.op == ActionType.PUT:
-                    self._put(tree, sk, action.data)
+                    self._put(view, sk, action.data, action.condition)
                 elif action.op == ActionType.DELETE:
-                    self._delete(tree, sk)
+                    self._delete(view, sk, action.condition)
                 else:
                     warnings.warn(f"Unknown action: {action.op}")
 
-    def query(self, starts_with: Optional[str], scan_index_forward: bool) -> List:
-        with self.read_access() as tree:
-            tree: SortedDict
-            if scan_index_forward:
-                return [tree[sk] for sk in tree.irange(minimum=starts_with)]
-            else:
-                return [
-                    tree[sk] for sk in tree.irange(maximum=starts_with, reverse=True)
-                ]
+    def query(
+        self,
+        key_range: _KeyRange,
+        scan_index_forward: bool,
+        limit: Optional[int] = None,
+        index: Optional[LocalSecondaryIndex] = None,
+    ) -> Iterator[dict]:
+        """
+        Streams items of the key range from a snapshot of the partition, reading only the overlapping segments
+
+        :param index: local secondary index the key range refers to, keys are `(attribute value, sort key)`
+        """
+        if index is not None:
+            with self.read_access(index=index) as view:
+                sks = key_range.values(view.index, reverse=not scan_index_forward)
+                items = (view.get(sk) for sk in islice(sks, limit))
+                yield from map(self._output, items)
+            return
+
+        with self.read_access(key_range) as view:
+            items = view.irange(key_range, reverse=not scan_index_forward)
+            yield from map(self._output, islice(items, limit))
 
 
 class BatchWriter:
-    def __init__(self, db: "Dynafile", pk_attribute: str):
+    def __init__(
+        self,
+        db: "Dynafile",
+        pk_attribute: str,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+    ):
         self._db = db
         self._queue: Optional[List[Action]] = None
         self._pk_attribute = pk_attribute
+        self._executor = executor
+        self._max_workers = max_workers
+
+        self.result: Optional[BatchResult] = None
 
-    def put_item(self, *, item: dict):
-        self._queue.append(Action(ActionType.PUT, item))
+    def put_item(self, *, item: dict, condition: Optional[Filter] = None):
+        self._queue.append(Action(ActionType.PUT, item, condition))
 
-    def delete_item(self, *, key: dict):
-        self._queue.append(Action(ActionType.DELETE, key))
+    def delete_item(self, *, key: dict, condition: Optional[Filter] = None):
+        self._queue.append(Action(ActionType.DELETE, key, condition))
 
     def __enter__(self):
         if self._queue:
@@ -153,7 +1173,107 @@ class BatchWriter:
         # Group by partition and batch write and delete
         queue = self._queue
         self._queue = None
-        self._db.execute_batch(queue)
+        self.result = self._db.execute_batch(
+            queue, executor=self._executor, max_workers=self._max_workers
+        )
+
+
+class _WriteBuffer:
+    """
+    Write-behind buffer of `put_item` and `delete_item` calls by partition hash.
+
+    Buffered actions of a partition are written together by `execute_write_batch`, once `max_items` actions are
+    buffered, `window` seconds after the first one, on `flush` or before the partition is accessed.
+
+    A partition is written by one flush at a time, which keeps the order of its actions. Accesses wait until the
+    partition is written. Stream events of a flush are emitted once it is done, so listeners can access the table.
+    """
+
+    def __init__(self, db: "Dynafile", window: float, max_items: int):
+        self._db = db
+        self.window = window
+        self._max_items = max_items
+
+        self._lock = threading.Condition()
+        # time of the first buffered action and actions by partition hash
+        self._pending: Dict[str, Tuple[float, List[Action]]] = {}
+        # partitions written by a flush
+        self._flushing: Set[str] = set()
+        # errors of background flushes, raised by the next flush
+        self._errors: Dict[Any, BaseException] = {}
+
+    def add(self, partition_hash: str, action: Action):
+        with self._lock:
+            _, actions = self._pending.setdefault(
+                partition_hash, (time.monotonic(), [])
+            )
+            actions.append(action)
+            full = len(actions) >= self._max_items
+
+        if full:
+            self.flush([partition_hash])
+
+    def pending(self, partition_hash: str) -> bool:
+        """Partition has buffered actions or is written by a flush"""
+        with self._lock:
+            return partition_hash in self._pending or partition_hash in self._flushing
+
+    def due(self) -> List[str]:
+        """Partitions buffering actions for longer than the window"""
+        deadline = time.monotonic() - self.window
+        with self._lock:
+            return [h for h, (since, _) in self._pending.items() if since <= deadline]
+
+    def flush(self, hashes: Optional[Iterable[str]] = None, raise_errors=True):
+        """
+        Writes the buffered actions of the given partitions, by default of all partitions.
+        Waits for flushes writing these partitions.
+
+        :raises BatchWriteError: if writing a partition failed, including failures of previous background flushes
+        """
+        with self._lock:
+            if hashes is None:
+                hashes = [*self._pending, *self._flushing]
+            hashes = set(hashes)
+            self._lock.wait_for(lambda: not self._flushing & hashes)
+
+            taken = [(h, self._pending.pop(h)[1]) for h in hashes if h in self._pending]
+            self._flushing.update(h for h, _ in taken)
+
+        db = self._db
+        try:
+            if taken:
+                per_partition = db._plan_batch(
+                    [a for _, actions in taken for a in actions]
+                )
+                with db._dispatcher.deferred():
+                    _, errors = db._map_partitions(self._write, per_partition)
+                with self._lock:
+                    self._errors.update(errors)
+        finally:
+            for partition_hash, _ in taken:
+                self._written(partition_hash)
+
+        with self._lock:
+            errors = self._errors
+            if not errors or not raise_errors:
+                return
+            self._errors = {}
+        raise BatchWriteError(errors) from next(iter(errors.values()))
+
+    def _write(self, pk, actions: List[Action]):
+        partition_hash = Dynafile._hash_key(pk)
+        try:
+            self._db._partition_handle(partition_hash).execute_write_batch(actions)
+        finally:
+            # accesses of this partition continue, while others are written
+            self._written(partition_hash)
+
+    def _written(self, partition_hash: str):
+        with self._lock:
+            if partition_hash in self._flushing:
+                self._flushing.discard(partition_hash)
+                self._lock.notify_all()
 
 
 class Dynafile:
@@ -167,37 +1287,209 @@ class Dynafile:
         pk_attribute="PK",
         sk_attribute="SK",
         ttl_attribute=None,
+        cache_max_items: Optional[int] = None,
+        cache_max_bytes: Optional[int] = None,
+        write_log: bool = False,
+        log_max_records: int = 1000,
+        log_max_bytes: int = 4 * 1024 * 1024,
+        max_partition_handles: int = 1024,
+        global_indexes: Iterable[GlobalSecondaryIndex] = (),
+        local_indexes: Iterable[LocalSecondaryIndex] = (),
+        split_max_items: Optional[int] = None,
+        split_max_bytes: Optional[int] = None,
+        codec: Optional[Codec] = None,
+        compression: Optional[str] = None,
+        bloom_filter: bool = False,
+        ttl_sweep_interval: Optional[float] = None,
+        stream_queue_size: Optional[int] = None,
+        stream_batch_size: int = 100,
+        stream_log: bool = False,
+        write_buffer_window: Optional[float] = None,
+        write_buffer_max_items: int = 1000,
+        durability: str = "fsync",
+        sync_interval: float = 1.0,
     ):
+        """
+        :param ttl_attribute: attribute containing the expiry time of an item (seconds since the epoch),
+            expired items are hidden from reads and deleted by `expire_items`
+        :param cache_max_items: enables the partition cache, limited to the given number of items
+        :param cache_max_bytes: enables the partition cache, limited to the given size of partition files
+        :param write_log: append changes to a per partition log instead of rewriting the partition file
+        :param log_max_records: number of log records, which trigger a compaction into the partition file
+        :param log_max_bytes: size of the log, which triggers a compaction into the partition file
+        :param max_partition_handles: number of partition handles kept for reuse
+        :param global_indexes: global secondary indexes, maintained on write and queryable by `index_name`
+        :param local_indexes: local secondary indexes, maintained on write and queryable by `index_name`
+        :param split_max_items: number of items, which trigger splitting a partition segment by sort key range
+        :param split_max_bytes: size of the segment files, which triggers splitting a partition segment by sort key range
+        :param codec: encoding of partition files, defaults to `PickleCodec`, see `dynafile.codec.migrate` to change it
+        :param compression: compression of partition files (`none`, `zlib`, `lzma`, `zstd`),
+            recorded in `meta.json`, defaults to the recorded compression
+        :param bloom_filter: keep bloom filters of the sort keys per partition, to answer lookups of missing items
+            without loading the partition
+        :param ttl_sweep_interval: seconds between calls of `expire_items` by a background thread, stopped by `close()`
+        :param stream_queue_size: deliver events to stream listeners by a background thread,
+            buffered in a queue of the given size, writes block while the queue is full
+        :param stream_batch_size: number of events delivered at once by the background thread
+        :param stream_log: append events to a persistent change log per partition, readable by `read_stream`
+        :param write_buffer_window: buffer `put_item` and `delete_item` calls in memory and write them per partition
+            together, about the given number of seconds after the first buffered call, see `flush`
+        :param write_buffer_max_items: number of buffered actions, which trigger writing a partition
+        :param durability: sync of written files (`fsync`, `atomic-no-fsync`, `deferred`), see `dynafile.durability`
+        :param sync_interval: seconds between syncs of written files with `deferred` durability
+        """
         self._path = Path(path)
         self._partition_path = self._path / "_partitions"
 
-        self._partitions: [bytes, _Partition] = {}
+        # partition handles by partition hash, least recently used first
+        self._partitions: "OrderedDict[str, _Partition]" = OrderedDict()
+        self._partitions_lock = threading.Lock()
+        self._max_partition_handles = max_partition_handles
 
         self._pk_attribute = pk_attribute
         self._sk_attribute = sk_attribute
         self._ttl_attribute = ttl_attribute
 
-        self._dispatcher = Dispatcher()
+        self._write_log = write_log
+        self._log_max_records = log_max_records
+        self._log_max_bytes = log_max_bytes
+
+        self._split_max_items = split_max_items
+        self._split_max_bytes = split_max_bytes
+
+        self._codec = codec or PickleCodec()
+        self._compression = self._init_compression(compression)
+        self._durability = Durability(durability, sync_interval=sync_interval)
+        self._bloom_stats = BloomStats() if bloom_filter else None
+
+        self._dispatcher = Dispatcher(
+            queue_size=stream_queue_size, batch_size=stream_batch_size
+        )
+        self._stream_log = stream_log
+
+        self._cache: Optional[PartitionCache] = None
+        if cache_max_items is not None or cache_max_bytes is not None:
+            self._cache = PartitionCache(
+                max_items=cache_max_items, max_bytes=cache_max_bytes
+            )
+
+        self._indexes: Dict[str, _IndexTable] = {
+            index.name: _IndexTable(self, index) for index in global_indexes
+        }
+        self._local_indexes: Dict[str, LocalSecondaryIndex] = {
+            index.name: index for index in local_indexes
+        }
+        if self._indexes.keys() & self._local_indexes.keys():
+            raise ValueError("Index names have to be unique")
+
+        # expiry is tracked for tables with TTL, index tables only hide expired items
+        self._track_expiry = ttl_attribute is not None
+
+        self._closed = threading.Event()
+        if ttl_sweep_interval is not None:
+            threading.Thread(
+                target=_sweep_periodically,
+                args=(weakref.ref(self), self._closed, ttl_sweep_interval),
+                name="dynafile-ttl",
+                daemon=True,
+            ).start()
+
+        self._write_buffer: Optional[_WriteBuffer] = None
+        if write_buffer_window is not None:
+            self._write_buffer = _WriteBuffer(
+                self, write_buffer_window, write_buffer_max_items
+            )
+            threading.Thread(
+                target=_flush_periodically,
+                args=(weakref.ref(self), self._closed, write_buffer_window),
+                name="dynafile-write-buffer",
+                daemon=True,
+            ).start()
 
     def _new_pratition(self, hash):
         return _Partition(
             path=self._partition_path / hash,
             sk_attribute=self._sk_attribute,
             dispatcher=self._dispatcher,
+            cache=self._cache,
+            write_log=self._write_log,
+            log_max_records=self._log_max_records,
+            log_max_bytes=self._log_max_bytes,
+            sort_key=self._sort_key,
+            indexes=self._indexes.values(),
+            local_indexes=self._local_indexes.values(),
+            split_max_items=self._split_max_items,
+            split_max_bytes=self._split_max_bytes,
+            codec=self._codec,
+            compression=self._compression,
+            bloom_stats=self._bloom_stats,
+            ttl_attribute=self._ttl_attribute if self._track_expiry else None,
+            stream_log=self._stream_log,
+            durability=self._durability,
         )
 
-    def put_item(self, *, item: dict):
+    def _init_compression(self, name: Optional[str]) -> Optional[Compression]:
+        """Compression by name or as recorded in the table metadata, records a given compression"""
+        if name is None:
+            return _compression.compression(_compression.recorded(self._path))
+
+        compression = _compression.compression(name)
+        _compression.record(self._path, name)
+        return compression
+
+    def _sort_key(self, item: dict):
+        """Key of an item within its partition"""
+        return item.get(self._sk_attribute)
+
+    def cache_info(self) -> Optional[CacheInfo]:
+        """Hit, miss and eviction counters of the partition cache, `None` if the cache is disabled"""
+        if self._cache is None:
+            return None
+        return self._cache.info()
+
+    def bloom_info(self) -> Optional[BloomInfo]:
+        """Counters of the bloom filters, `None` if bloom filters are disabled"""
+        if self._bloom_stats is None:
+            return None
+        return self._bloom_stats.info()
+
+    def put_item(self, *, item: dict, condition: Optional[Filter] = None):
+        """
+        Stores an item, replacing an existing item with the same key
+
+        :param condition: filter the existing item has to match, evaluated under the partition write lock,
+            missing and expired items are passed as empty dict
+        :raises ConditionalCheckFailed: if the condition does not match, nothing is written
+        """
         pk = item.get(self._pk_attribute)
         sk = item.get(self._sk_attribute)
         # if pk is None:
         #     raise Exception("Partition key have to be set")
 
+        if self._write_buffer and condition is None:
+            for table in self._indexes.values():
+                table.check(item)
+            # written later, changes of the caller must not affect the buffered item
+            self._write_buffer.add(
+                self._hash_key(pk), Action(ActionType.PUT, dict(item))
+            )
+            return
+
         partition = self._get_partition(pk)
-        partition.add_item(key=sk, item=item)
+        partition.add_item(key=sk, item=item, condition=self._condition(condition))
 
-    def batch_writer(self) -> BatchWriter:
-        """Allow batched `put_item` and `delete_item` calls, loading partition only ones"""
-        return BatchWriter(self, self._pk_attribute)
+    def batch_writer(
+        self, executor: Optional[Executor] = None, max_workers: Optional[int] = None
+    ) -> BatchWriter:
+        """
+        Allow batched `put_item` and `delete_item` calls, loading partition only ones
+
+        :param executor: writes partitions concurrently using the given executor
+        :param max_workers: writes partitions concurrently using a thread pool of the given size
+        """
+        return BatchWriter(
+            self, self._pk_attribute, executor=executor, max_workers=max_workers
+        )
 
     def get_item(self, *, key: dict) -> Optional[dict]:
         pk = key.get(self._pk_attribute)
@@ -210,81 +1502,445 @@ class Dynafile:
         #     raise Exception("Sort key have to be set")
         item = partition.get_item(sk)
 
-        # expire items
-        if item is not None and self._ttl_should_delete(item):
-            self.delete_item(key=item)
+        # expired items are hidden until they are deleted by `expire_items`
+        if self._expired(item):
             return None
 
         return item
 
-    def delete_item(self, *, key: dict):
+    def batch_get_item(
+        self,
+        *,
+        keys: List[dict],
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+    ) -> List[Optional[dict]]:
+        """
+        Retrieve multiple items, loading each partition only once.
+
+        :param keys: keys of the items to retrieve
+        :param executor: loads partitions concurrently using the given executor
+        :param max_workers: loads partitions concurrently using a thread pool of the given size
+        :return: items in order of `keys`, `None` for missing items
+        """
+        # positions of the requested keys by partition
+        per_partition: Dict[Any, List[int]] = {}
+        for i, key in enumerate(keys):
+            per_partition.setdefault(key.get(self._pk_attribute), []).append(i)
+
+        def fetch(pk, positions):
+            sks = [keys[i].get(self._sk_attribute) for i in positions]
+            return self._get_partition(pk).get_items(sks)
+
+        results, errors = self._map_partitions(
+            fetch, per_partition, executor=executor, max_workers=max_workers
+        )
+        if errors:
+            raise next(iter(errors.values()))
+
+        items: List[Optional[dict]] = [None] * len(keys)
+        for pk, positions in per_partition.items():
+            for i, item in zip(positions, results[pk]):
+                items[i] = item
+
+        # expired items are hidden until they are deleted by `expire_items`
+        return [None if self._expired(item) else item for item in items]
+
+    def update_item(
+        self,
+        *,
+        key: dict,
+        set: Optional[dict] = None,
+        remove: Iterable[str] = (),
+        add: Optional[dict] = None,
+        condition: Optional[Filter] = None,
+    ) -> UpdateResult:
+        """
+        Updates attributes of an item within a single load and save of its partition, missing items are created.
+
+        Stream listeners receive a `PUT` event with the item before and after the update.
+
+        :param key: key of the item
+        :param set: values of attributes to set
+        :param remove: attributes to remove
+        :param add: numbers to add to attributes or sets to merge into attributes, missing attributes are set
+        :param condition: filter the existing item has to match, see `put_item`
+        :return: item before and after the update
+        :raises ConditionalCheckFailed: if the condition does not match, nothing is written
+        """
+        set = set or {}
+        add = add or {}
+        remove = list(remove)
+
+        attributes = [*set, *remove, *add]
+        if len(attributes) != len(frozenset(attributes)):
+            raise ValueError("Attributes can only be updated once per update")
+        key_attributes = {self._pk_attribute, self._sk_attribute}
+        if key_attributes.intersection(attributes):
+            raise ValueError("Key attributes can not be updated")
+
+        def update(item: Optional[dict]) -> dict:
+            if item is None or self._expired(item):
+                item = {attr: key.get(attr) for attr in key_attributes}
+            else:
+                item = dict(item)
+
+            item.update(set)
+            for attr in remove:
+                item.pop(attr, None)
+            for attr, value in add.items():
+                item[attr] = _add(item.get(attr), value, attr)
+            return item
+
+        # expired items count as missing
+        old, new = self._get_partition(key.get(self._pk_attribute)).update_item(
+            key.get(self._sk_attribute), update, condition=self._condition(condition)
+        )
+        return UpdateResult(None if self._expired(old) else old, new)
+
+    def delete_item(self, *, key: dict, condition: Optional[Filter] = None):
+        """
+        Deletes an item, deleting a missing item is a no-op
+
+        :param condition: filter the existing item has to match, see `put_item`
+        :raises ConditionalCheckFailed: if the condition does not match, nothing is written
+        """
         pk = key.get(self._pk_attribute)
         # if pk is None:
         #     raise Exception("Partition key have to be set")
+        if self._write_buffer and condition is None:
+            self._write_buffer.add(
+                self._hash_key(pk), Action(ActionType.DELETE, dict(key))
+            )
+            return
+
         partition = self._get_partition(pk)
 
         sk = key.get(self._sk_attribute)
         # if sk is None:
         #     raise Exception("Sort key have to be set")
-        partition.delete_item(sk)
+        partition.delete_item(sk, condition=self._condition(condition))
 
-    def execute_batch(self, actions: List[Action]):
+    def execute_batch(
+        self,
+        actions: List[Action],
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+    ) -> BatchResult:
         """
         Write all batches.
 
+        Only the last action per item is applied, each partition is loaded and saved once.
+        Partitions are written one after another, or concurrently if an `executor` or `max_workers` is given.
+        Actions of one partition are always applied in order.
+        Failing partitions do not stop the others, their errors are raised together as `BatchWriteError`.
+        Partitions are not written, if the condition of one of their actions fails (`ConditionalCheckFailed`).
+        Actions with a condition can not be combined with other actions of the same item.
+
         :param actions:
-        :return:
+        :param executor: executor to write partitions with, has to run in the same process (e.g. `ThreadPoolExecutor`)
+        :param max_workers: size of a thread pool to write partitions with, if no executor is given
+        :raises ValueError: if an action with a condition would be coalesced, nothing is written
         """
-        # Group by partition
-        per_partition = {
-            partition: list(ops)
-            for partition, ops in groupby(
-                actions, key=lambda a: a.data.get(self._pk_attribute)
-            )
-        }
-
-        # Consolidate?
-        # TODO optimisation: only apply last action, drop others
+        per_partition = self._plan_batch(
+            [
+                action._replace(condition=self._condition(action.condition))
+                if action.condition is not None
+                else action
+                for action in actions
+            ]
+        )
 
         # Execute
-        for key, ops in per_partition.items():
-            # TODO might be parallel
-            partition = self._get_partition(key)
-            partition.execute_write_batch(ops)
+        _, errors = self._map_partitions(
+            lambda pk, ops: self._get_partition(pk).execute_write_batch(ops),
+            per_partition,
+            executor=executor,
+            max_workers=max_workers,
+        )
+        if errors:
+            raise BatchWriteError(errors) from next(iter(errors.values()))
+
+        applied = sum(map(len, per_partition.values()))
+        return BatchResult(
+            partitions=len(per_partition),
+            actions=applied,
+            coalesced=len(actions) - applied,
+        )
+
+    def _plan_batch(self, actions: List[Action]) -> Dict[Any, List[Action]]:
+        """Group actions by partition, keeping only the last action per item in order of appearance"""
+        per_partition: Dict[Any, Dict[Any, Action]] = {}
+        for action in actions:
+            pk = action.data.get(self._pk_attribute)
+            sk = self._sort_key(action.data)
+
+            ops = per_partition.setdefault(pk, {})
+            previous = ops.pop(sk, None)
+            if previous is not None and (
+                previous.condition is not None or action.condition is not None
+            ):
+                # the condition of a dropped action would be lost
+                raise ValueError(
+                    "Actions with a condition can not be combined with other actions of the same item"
+                )
+            ops[sk] = action
+
+        return {pk: list(ops.values()) for pk, ops in per_partition.items()}
+
+    def _map_partitions(
+        self,
+        fn: Callable[[Any, Any], Any],
+        per_partition: Dict[Any, Any],
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+    ) -> Tuple[Dict[Any, Any], Dict[Any, BaseException]]:
+        """
+        Calls `fn(partition_key, value)` for each partition, concurrently if an `executor` or `max_workers` is given.
+
+        :return: results and errors by partition key
+        """
+        if executor is None and max_workers is not None and len(per_partition) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                return self._map_partitions(fn, per_partition, executor=pool)
+
+        results = {}
+        errors = {}
+
+        if executor is None:
+            for key, value in per_partition.items():
+                try:
+                    results[key] = fn(key, value)
+                except Exception as e:
+                    errors[key] = e
+        else:
+            futures = {
+                key: executor.submit(fn, key, value)
+                for key, value in per_partition.items()
+            }
+            for key, future in futures.items():
+                error = future.exception()
+                if error is None:
+                    results[key] = future.result()
+                else:
+                    errors[key] = error
+
+        return results, errors
 
     def _get_partition(self, partition_key: str) -> _Partition:
         """Read partition from files"""
-        partition_hash = Dynafile._hash_key(partition_key)
-        partition = self._partitions.get(partition_hash)
-        if partition is None:
-            partition = self._new_pratition(partition_hash)
-            self._partitions[partition_key] = partition
+        return self._get_partition_by_hash(Dynafile._hash_key(partition_key))
+
+    def _get_partition_by_hash(self, partition_hash: str) -> _Partition:
+        """Partition handle, writes buffered actions of the partition first"""
+        if self._write_buffer and self._write_buffer.pending(partition_hash):
+            self._write_buffer.flush([partition_hash])
+        return self._partition_handle(partition_hash)
+
+    def _partition_handle(self, partition_hash: str) -> _Partition:
+        with self._partitions_lock:
+            partition = self._partitions.get(partition_hash)
+            if partition is None:
+                partition = self._new_pratition(partition_hash)
+                self._partitions[partition_hash] = partition
+                if len(self._partitions) > self._max_partition_handles:
+                    self._partitions.popitem(last=False)
+            else:
+                self._partitions.move_to_end(partition_hash)
 
         return partition
 
     @staticmethod
+    @lru_cache(maxsize=4096)
     def _hash_key(key: str) -> str:
         return hashlib.sha256(key.encode()).hexdigest()
 
-    def _ttl_should_delete(self, item: dict) -> bool:
-        if self._ttl_attribute and item:
-            ttl = item.get(self._ttl_attribute)
-            return ttl and ttl < time.time()
+    def _expired(self, item: Optional[dict]) -> bool:
+        if self._ttl_attribute:
+            expires = expiry_of(item, self._ttl_attribute)
+            return expires is not None and expires < time.time()
         return False
 
-    def scan(self, _filter: Optional[Filter] = None) -> Iterable[dict]:
+    def expire_items(self) -> int:
+        """
+        Deletes all expired items, partition by partition.
+
+        Each partition records a lower bound of the expiry times of its items,
+        partitions without expired items are not loaded.
+        Deletes are propagated to indexes and stream listeners.
+
+        :return: number of deleted items
+        """
+        if not self._ttl_attribute:
+            return 0
+
+        self.flush()
+        now = time.time()
+        deleted = 0
+        for file in sorted(self._partition_path.glob("*/")):
+            expires = load_expiry(file / "expiry.json")
+            if expires is not None and expires >= now:
+                continue
+            deleted += self._get_partition_by_hash(file.name).expire_items(now)
+        return deleted
+
+    def flush(self):
+        """
+        Writes all buffered `put_item` and `delete_item` calls, see `write_buffer_window`
+
+        :raises BatchWriteError: if writing a partition failed, including failures of background flushes
+        """
+        if self._write_buffer:
+            self._write_buffer.flush()
+
+    def close(self):
+        """
+        Writes buffered items, stops background threads, delivers the buffered stream events
+        and syncs files written with `deferred` durability
+        """
+        self._closed.set()
+        try:
+            self.flush()
+        finally:
+            self._dispatcher.close()
+            self._durability.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def scan(
+        self,
+        _filter: Optional[Filter] = None,
+        *,
+        limit: Optional[int] = None,
+        exclusive_start_key: Optional[dict] = None,
+        segment: Optional[int] = None,
+        total_segments: Optional[int] = None,
+    ) -> "QueryResult":
+        """
+        Scan all items, partition by partition.
+
+        Segments split the partitions by their hash into `total_segments` disjoint parts,
+        which can be scanned independently, see `parallel_scan`.
+
+        :param _filter: filter applied to the items
+        :param limit: maximal number of items to evaluate, before filters are applied
+        :param exclusive_start_key: continue after this key, use `last_evaluated_key` of the previous page
+        :param segment: segment to scan, starting with 0
+        :param total_segments: number of segments
+        """
         _filter = self.__parse_filter(_filter)
+        _check_limit(limit)
+        _check_segment(segment, total_segments)
+        # partitions are listed from disk
+        self.flush()
+        return QueryResult(
+            self._scan(_filter, limit, exclusive_start_key, segment, total_segments)
+        )
+
+    def parallel_scan(
+        self,
+        _filter: Optional[Filter] = None,
+        *,
+        total_segments: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[dict]:
+        """
+        Scan all items using a process pool, yielding the items of each segment once it is completed.
+
+        Workers open the database on their own, the filter has to be picklable (e.g. a string expression).
+
+        :param _filter: filter applied to the items
+        :param total_segments: number of segments to split the scan into, defaults to four per worker
+        :param executor: executor to scan segments with, defaults to a `ProcessPoolExecutor`
+        :param max_workers: size of the process pool, defaults to the number of CPUs
+        """
+        workers = max_workers or os.cpu_count() or 1
+        total_segments = total_segments or workers * 4
+
+        if executor is None:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                yield from self.parallel_scan(
+                    _filter, total_segments=total_segments, executor=pool
+                )
+            return
+
+        self.flush()
+        options = self._worker_options()
+        futures = [
+            executor.submit(_scan_segment, options, segment, total_segments, _filter)
+            for segment in range(total_segments)
+        ]
+        for future in as_completed(futures):
+            yield from future.result()
+
+    def _worker_options(self) -> dict:
+        """Arguments to open this database in worker processes"""
+        return dict(
+            path=self._path,
+            pk_attribute=self._pk_attribute,
+            sk_attribute=self._sk_attribute,
+            ttl_attribute=self._ttl_attribute,
+            write_log=self._write_log,
+            log_max_records=self._log_max_records,
+            log_max_bytes=self._log_max_bytes,
+            global_indexes=[table.index for table in self._indexes.values()],
+            local_indexes=list(self._local_indexes.values()),
+            split_max_items=self._split_max_items,
+            split_max_bytes=self._split_max_bytes,
+            codec=self._codec,
+            compression=self._compression.name if self._compression else "none",
+            bloom_filter=self._bloom_stats is not None,
+        )
 
-        for file in self._partition_path.glob("*/"):
-            partition = _Partition(path=file, sk_attribute=self._sk_attribute)
-            for item in partition.query(None, True):
-                if self._ttl_should_delete(item):
-                    self.delete_item(key=item)
+    def _scan(
+        self,
+        _filter: Callable,
+        limit: Optional[int],
+        exclusive_start_key,
+        segment: Optional[int],
+        total_segments: Optional[int],
+    ):
+        # stable order of partitions to support pagination
+        hashes = sorted(file.name for file in self._partition_path.glob("*/"))
+
+        if total_segments is not None:
+            hashes = [h for h in hashes if _segment_of(h, total_segments) == segment]
+
+        start_hash = None
+        if exclusive_start_key:
+            start_hash = Dynafile._hash_key(exclusive_start_key[self._pk_attribute])
+            hashes = hashes[bisect_left(hashes, start_hash) :]
+
+        remaining = limit
+        for partition_hash in hashes:
+            key_range = _KeyRange()
+            if partition_hash == start_hash:
+                key_range = key_range.after(
+                    self._sort_key(exclusive_start_key), reverse=False
+                )
+
+            partition = self._get_partition_by_hash(partition_hash)
+            evaluated = 0
+            for item in partition.query(key_range, True, limit=remaining):
+                evaluated += 1
+                last = item
+
+                if self._expired(item):
                     continue
 
                 if _filter(item):
                     yield item
 
+            if remaining is not None:
+                remaining -= evaluated
+                if remaining == 0:
+                    return self._key_of(last)
+
     def query(
         self,
         pk,
@@ -292,20 +1948,140 @@ class Dynafile:
         starts_with="",
         scan_index_forward=True,
         _filter: Optional[Filter] = None,
-    ) -> Iterable[dict]:
+        begins_with=None,
+        between: Optional[Tuple[Any, Any]] = None,
+        lt=None,
+        lte=None,
+        gt=None,
+        gte=None,
+        limit: Optional[int] = None,
+        exclusive_start_key: Optional[dict] = None,
+        index_name: Optional[str] = None,
+    ) -> "QueryResult":
+        """
+        Query items of a partition, ordered by sort key.
+
+        Key conditions limit the sort key range, multiple conditions are combined.
+        Only the matching range of the partition is read.
+
+        :param pk: partition key
+        :param starts_with: sort key to start at, in direction of `scan_index_forward`
+        :param scan_index_forward: ascending (`True`) or descending (`False`) order
+        :param _filter: filter applied to the items within the key range
+        :param begins_with: sort key prefix
+        :param between: inclusive sort key range `(low, high)`
+        :param lt: sort key less than
+        :param lte: sort key less than or equal
+        :param gt: sort key greater than
+        :param gte: sort key greater than or equal
+        :param limit: maximal number of items to evaluate, before filters are applied
+        :param exclusive_start_key: continue after this key, use `last_evaluated_key` of the previous page
+        :param index_name: query a secondary index, key conditions refer to the index sort key,
+            `pk` to the index partition key of global secondary indexes
+        """
         _filter = self.__parse_filter(_filter)
+        _check_limit(limit)
+
+        index = self._local_indexes.get(index_name)
+        table = self._index_table(index_name) if index_name and not index else self
+        if table is not self:
+            # global indexes are updated on write
+            self.flush()
+
+        key_range = _KeyRange.of(
+            begins_with=begins_with,
+            between=between,
+            lt=lt,
+            lte=lte,
+            gt=gt,
+            gte=gte,
+            reverse=not scan_index_forward,
+            start=starts_with or None,
+        )
+        key_range = table._query_range(
+            key_range, exclusive_start_key, reverse=not scan_index_forward, index=index
+        )
 
-        partition = self._get_partition(pk)
-        for item in partition.query(
-            starts_with=starts_with, scan_index_forward=scan_index_forward
-        ):
-            if _filter(item):
-                if self._ttl_should_delete(item):
-                    self.delete_item(key=item)
-                    continue
+        partition = table._get_partition(pk)
+        items = partition.query(key_range, scan_index_forward, limit=limit, index=index)
+        return QueryResult(table._query(items, _filter, limit, index=index))
+
+    def _query_range(
+        self,
+        key_range: _KeyRange,
+        exclusive_start_key: Optional[dict],
+        reverse: bool,
+        index: Optional[LocalSecondaryIndex] = None,
+    ) -> _KeyRange:
+        if index is not None:
+            key_range = key_range.composite()
+        if exclusive_start_key:
+            key = self._sort_key(exclusive_start_key)
+            if index is not None:
+                key = (exclusive_start_key.get(index.sk_attribute), key)
+            return key_range.after(key, reverse)
+        return key_range
+
+    def _query(
+        self,
+        items: Iterator[dict],
+        _filter: Callable,
+        limit: Optional[int],
+        index: Optional[LocalSecondaryIndex] = None,
+    ):
+        evaluated = 0
+        for item in items:
+            evaluated += 1
+            last = item
 
+            if _filter(item) and not self._expired(item):
                 yield item
 
+        if limit is not None and evaluated == limit:
+            key = self._key_of(last)
+            if index is not None:
+                key[index.sk_attribute] = last.get(index.sk_attribute)
+            return key
+
+    def _key_of(self, item: dict) -> dict:
+        return {
+            self._pk_attribute: item.get(self._pk_attribute),
+            self._sk_attribute: item.get(self._sk_attribute),
+        }
+
+    def _index_table(self, index_name: str) -> "_IndexTable":
+        try:
+            return self._indexes[index_name]
+        except KeyError:
+            raise ValueError(f"Unknown index: {index_name}") from None
+
+    def backfill_index(self, index_name: str):
+        """
+        Rebuilds a global secondary index from all items, required after adding an index to an existing table.
+
+        Writes to the table during the backfill might be missing in the index.
+        """
+        table = self._index_table(index_name)
+        shutil.rmtree(table._path, ignore_errors=True)
+        self.flush()
+
+        for file in sorted(self._partition_path.glob("*/")):
+            partition = self._get_partition_by_hash(file.name)
+            items = list(partition.query(_KeyRange(), True))
+            table.apply([_Change(ActionType.PUT, None, item, None) for item in items])
+
+    def _condition(
+        self, condition: Optional[Filter]
+    ) -> Optional[Callable[[Optional[dict]], bool]]:
+        """Condition of a write, evaluated with the existing item"""
+        if condition is None:
+            return None
+
+        matches = self.__parse_filter(condition)
+        return lambda item: bool(
+            matches({} if item is None or self._expired(item) else item)
+        )
+
     def __parse_filter(self, _filter: Optional[Filter]) -> Callable:
         if _filter is None:
             return bool
@@ -322,7 +2098,178 @@ class Dynafile:
                 ) from e
 
     def add_stream_listener(self, listener: EventListener):
+        """Listeners are called with the events of saved changes, in order of the changes per partition"""
         self._dispatcher.connect(listener)
 
+    def flush_stream(self):
+        """Waits until all buffered events are delivered to the stream listeners"""
+        self._dispatcher.flush()
+
+    def read_stream(
+        self, checkpoint: Optional[Dict[str, int]] = None
+    ) -> Iterator[StreamRecord]:
+        """
+        Reads the change log, shard by shard. Each partition is a shard, ordered by sequence numbers.
+
+        Requires `stream_log`, consumers track the sequence number of the last processed record per shard
+        to resume from it.
+
+        :param checkpoint: sequence number of the last processed record by shard
+        """
+        checkpoint = checkpoint or {}
+        for file in sorted(self._partition_path.glob("*/")):
+            yield from read_events(
+                file / "stream.log", file.name, checkpoint.get(file.name)
+            )
+
+
+class _IndexTable(Dynafile):
+    """
+    Table of a global secondary index, items are stored a second time under the index keys.
+
+    Sort keys are composed as `(index sort key, table partition key, table sort key)` to keep them unique.
+    """
+
+    def __init__(self, table: Dynafile, index: GlobalSecondaryIndex):
+        super().__init__(
+            table._path / f"_gsi-{index.name}",
+            pk_attribute=index.pk_attribute,
+            sk_attribute=index.sk_attribute,
+            ttl_attribute=table._ttl_attribute,
+            write_log=table._write_log,
+            log_max_records=table._log_max_records,
+            log_max_bytes=table._log_max_bytes,
+            max_partition_handles=table._max_partition_handles,
+            split_max_items=table._split_max_items,
+            split_max_bytes=table._split_max_bytes,
+            codec=table._codec,
+        )
+        self.index = index
+        self._table = table
+        # share the budget of the table
+        self._cache = table._cache
+        self._compression = table._compression
+        self._durability = table._durability
+        # expired items are deleted from the table, which updates the index
+        self._track_expiry = False
+
+    def _sort_key(self, item: dict):
+        return (
+            item.get(self.index.sk_attribute) if self.index.sk_attribute else None,
+            item.get(self._table._pk_attribute),
+            item.get(self._table._sk_attribute),
+        )
+
+    def _query_range(
+        self,
+        key_range: _KeyRange,
+        exclusive_start_key: Optional[dict],
+        reverse: bool,
+        index: Optional[LocalSecondaryIndex] = None,
+    ) -> _KeyRange:
+        return super()._query_range(key_range.composite(), exclusive_start_key, reverse)
+
+    def _key_of(self, item: dict) -> dict:
+        key = self._table._key_of(item)
+        key[self.index.pk_attribute] = item.get(self.index.pk_attribute)
+        if self.index.sk_attribute:
+            key[self.index.sk_attribute] = item.get(self.index.sk_attribute)
+        return key
+
+    def _indexed(self, item: Optional[dict]) -> bool:
+        # other values of the partition key are rejected by `check`, skipped if written before
+        return (
+            item is not None
+            and isinstance(item.get(self.index.pk_attribute), str)
+            and (
+                self.index.sk_attribute is None
+                or item.get(self.index.sk_attribute) is not None
+            )
+        )
+
+    def check(self, item: dict):
+        """Raises a `ValueError`, if the item can not be indexed"""
+        value = item.get(self.index.pk_attribute)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(
+                f"Partition key {self.index.pk_attribute!r} of index {self.index.name!r} has to be a string, "
+                f"got {type(value).__name__}"
+            )
 
-__all__ = ["Dynafile", "Event", "EventListener", "Action", "ActionType"]
+    def apply(self, changes: List[_Change]):
+        """Applies changes of the table to the index"""
+        actions = []
+        for change in changes:
+            old = change.old if self._indexed(change.old) else None
+            new = change.new if self._indexed(change.new) else None
+
+            if old is not None and (
+                new is None
+                or old[self.index.pk_attribute] != new[self.index.pk_attribute]
+                or self._sort_key(old) != self._sort_key(new)
+            ):
+                actions.append(Action(ActionType.DELETE, old))
+            if new is not None:
+                actions.append(Action(ActionType.PUT, new))
+
+        if actions:
+            self.execute_batch(actions)
+
+
+def _sweep_periodically(
+    ref: "weakref.ref[Dynafile]", closed: threading.Event, interval: float
+):
+    while not closed.wait(interval):
+        db = ref()
+        if db is None:
+            return
+        try:
+            db.expire_items()
+        except Exception as e:
+            warnings.warn(f"TTL sweep failed: {e!r}")
+        del db
+
+
+def _flush_periodically(
+    ref: "weakref.ref[Dynafile]", closed: threading.Event, window: float
+):
+    # check twice per window, actions are written within 1.5 windows
+    while not closed.wait(window / 2):
+        db = ref()
+        if db is None:
+            return
+        buffer = db._write_buffer
+        due = buffer.due()
+        if due:
+            buffer.flush(due, raise_errors=False)
+        del db, buffer
+
+
+def _scan_segment(
+    options: dict, segment: int, total_segments: int, _filter: Optional[Filter]
+) -> List[dict]:
+    db = Dynafile(**options)
+    return list(db.scan(_filter, segment=segment, total_segments=total_segments))
+
+
+__all__ = [
+    "Dynafile",
+    "Event",
+    "EventListener",
+    "Action",
+    "ActionType",
+    "CacheInfo",
+    "BloomInfo",
+    "BatchWriteError",
+    "BatchResult",
+    "UpdateResult",
+    "ConditionalCheckFailed",
+    "QueryResult",
+    "GlobalSecondaryIndex",
+    "LocalSecondaryIndex",
+    "Codec",
+    "PickleCodec",
+    "RecordCodec",
+    "MappedCodec",
+    "StreamRecord",
+]
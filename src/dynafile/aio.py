@@ -0,0 +1,285 @@
+"""
+Asyncio interface to the Dynafile DB.
+
+Blocking file access runs on a bounded thread pool, so the event loop is never blocked by loads, saves or fsyncs.
+Concurrent reads of one partition are coalesced, reads waiting for a worker are collected and served by a single load.
+"""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from dynafile import (
+    Action,
+    ActionType,
+    BatchResult,
+    Dynafile,
+    Filter,
+    QueryResult,
+    UpdateResult,
+)
+
+
+class AsyncQueryResult:
+    """
+    Items returned by `AsyncDynafile.query` and `AsyncDynafile.scan`, iterated with `async for`.
+
+    The result is opened and items are fetched in chunks of `chunk_size` items within the executor,
+    once the iteration stopped because of `limit`, `last_evaluated_key` contains the key to continue from.
+    """
+
+    def __init__(
+        self, db: "AsyncDynafile", open: Callable[[], QueryResult], chunk_size: int
+    ):
+        self._db = db
+        self._open = open
+        self._result: Optional[QueryResult] = None
+        self._chunk_size = chunk_size
+        self._chunk: Iterator[dict] = iter(())
+        self._exhausted = False
+
+    @property
+    def last_evaluated_key(self) -> Optional[dict]:
+        if self._result is None:
+            return None
+        return self._result.last_evaluated_key
+
+    def _fetch(self) -> List[dict]:
+        if self._result is None:
+            # opening flushes buffered writes
+            self._result = self._open()
+        return list(islice(self._result, self._chunk_size))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        for item in self._chunk:
+            return item
+
+        if not self._exhausted:
+            chunk = await self._db._run(self._fetch)
+            self._exhausted = len(chunk) < self._chunk_size
+            self._chunk = iter(chunk)
+            for item in self._chunk:
+                return item
+
+        raise StopAsyncIteration
+
+
+class AsyncBatchWriter:
+    """Collects `put_item` and `delete_item` calls, written by `execute_batch` on exit"""
+
+    def __init__(self, db: "AsyncDynafile"):
+        self._db = db
+        self._queue: List[Action] = []
+
+        self.result: Optional[BatchResult] = None
+
+    def put_item(self, *, item: dict, condition: Optional[Filter] = None):
+        self._queue.append(Action(ActionType.PUT, item, condition))
+
+    def delete_item(self, *, key: dict, condition: Optional[Filter] = None):
+        self._queue.append(Action(ActionType.DELETE, key, condition))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        queue = self._queue
+        self._queue = []
+        self.result = await self._db.execute_batch(queue)
+
+
+class AsyncDynafile:
+    """
+    Asyncio interface to the Dynafile DB, see `Dynafile` for the semantics of all operations.
+
+    Use as `async with AsyncDynafile(path) as db: ...` or call `aclose()` to shut down the thread pool.
+    The underlying `Dynafile` is available as `sync`.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = "",
+        *,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        **options,
+    ):
+        """
+        :param max_workers: number of concurrent blocking operations, defaults to the thread pool default
+        :param executor: executor to run blocking operations with, not shut down by `close()`
+        :param options: options of `Dynafile`
+        """
+        self.sync = Dynafile(path, **options)
+
+        self._max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="dynafile"
+        )
+
+        # created within the running loop
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # pending reads per partition key, which are not started yet
+        self._reads: Dict[Any, List[Tuple[List[dict], asyncio.Future]]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """Closes the database within the executor and shuts down the own thread pool without blocking the loop"""
+        await self._run(self.sync.close)
+        if self._own_executor:
+            # the pool can not wait for itself
+            await asyncio.get_running_loop().run_in_executor(
+                None, partial(self._executor.shutdown, wait=True)
+            )
+
+    def close(self):
+        """Blocking variant of `aclose`, to be called outside of the event loop"""
+        self.sync.close()
+        if self._own_executor:
+            self._executor.shutdown(wait=True)
+
+    @asynccontextmanager
+    async def _slot(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_workers)
+        async with self._slots:
+            yield
+
+    async def _run(self, fn: Callable, *args, **kwargs):
+        """Runs a blocking call on the executor, waiting for a free worker"""
+        async with self._slot():
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, partial(fn, *args, **kwargs)
+            )
+
+    async def put_item(self, *, item: dict, condition: Optional[Filter] = None):
+        await self._run(self.sync.put_item, item=item, condition=condition)
+
+    async def update_item(self, *, key: dict, **kwargs) -> UpdateResult:
+        return await self._run(self.sync.update_item, key=key, **kwargs)
+
+    async def delete_item(self, *, key: dict, condition: Optional[Filter] = None):
+        await self._run(self.sync.delete_item, key=key, condition=condition)
+
+    async def get_item(self, *, key: dict) -> Optional[dict]:
+        return (await self.batch_get(keys=[key]))[0]
+
+    async def batch_get(self, *, keys: List[dict]) -> List[Optional[dict]]:
+        """
+        Retrieve multiple items, joining concurrent reads of the same partitions.
+
+        :return: items in order of `keys`, `None` for missing items
+        """
+        per_partition: Dict[Any, List[int]] = {}
+        for i, key in enumerate(keys):
+            per_partition.setdefault(key.get(self.sync._pk_attribute), []).append(i)
+
+        results = await asyncio.gather(
+            *(
+                self._read(pk, [keys[i] for i in positions])
+                for pk, positions in per_partition.items()
+            )
+        )
+
+        items: List[Optional[dict]] = [None] * len(keys)
+        for positions, partition_items in zip(per_partition.values(), results):
+            for i, item in zip(positions, partition_items):
+                items[i] = item
+        return items
+
+    def _read(self, pk, keys: List[dict]) -> asyncio.Future:
+        """Adds keys to the pending read of a partition, starts a read if there is none"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        pending = self._reads.get(pk)
+        if pending is None:
+            pending = self._reads[pk] = []
+            task = loop.create_task(self._flush_reads(pk))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        pending.append((keys, future))
+        return future
+
+    async def _flush_reads(self, pk):
+        async with self._slot():
+            # reads joining until a worker is free are served by this load
+            pending = self._reads.pop(pk)
+            keys = [key for request, _ in pending for key in request]
+            try:
+                items = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, partial(self.sync.batch_get_item, keys=keys)
+                )
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        offset = 0
+        for request, future in pending:
+            if not future.done():
+                future.set_result(items[offset : offset + len(request)])
+            offset += len(request)
+
+    async def execute_batch(self, actions: List[Action]) -> BatchResult:
+        return await self._run(self.sync.execute_batch, actions)
+
+    def batch_writer(self) -> AsyncBatchWriter:
+        """
+        Allow batched `put_item` and `delete_item` calls, written on exit of `async with`
+        """
+        return AsyncBatchWriter(self)
+
+    def query(self, pk, *, chunk_size: int = 100, **kwargs) -> AsyncQueryResult:
+        """
+        Query items of a partition, see `Dynafile.query` for the parameters.
+
+        Use as `async for item in db.query(pk): ...`, partitions are read on iteration.
+
+        :param chunk_size: number of items fetched per call to the executor
+        """
+        return AsyncQueryResult(
+            self, partial(self.sync.query, pk, **kwargs), chunk_size
+        )
+
+    def scan(self, *args, chunk_size: int = 100, **kwargs) -> AsyncQueryResult:
+        """
+        Scan all items, see `Dynafile.scan` for the parameters.
+
+        Use as `async for item in db.scan(): ...`, partitions are read on iteration.
+
+        :param chunk_size: number of items fetched per call to the executor
+        """
+        return AsyncQueryResult(
+            self, partial(self.sync.scan, *args, **kwargs), chunk_size
+        )
+
+    async def flush(self):
+        await self._run(self.sync.flush)
+
+    async def expire_items(self) -> int:
+        return await self._run(self.sync.expire_items)
+
+    def add_stream_listener(self, listener):
+        """Listeners are called within the executor threads"""
+        self.sync.add_stream_listener(listener)
+
+
+__all__ = ["AsyncDynafile", "AsyncQueryResult", "AsyncBatchWriter"]
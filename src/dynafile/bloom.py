@@ -0,0 +1,122 @@
+"""
+Bloom filters over the sort keys of partition files.
+
+A filter tells, whether a key is definitely not contained in a file, without loading the file.
+Filters store the signature of the file version they describe, filters of other versions are ignored.
+
+Only keys of type `str`, `bytes` and `int` are supported, equal keys of other types (e.g. `1.0 == 1`)
+would hash differently. Filters are not built for files containing other keys.
+"""
+
+import hashlib
+import marshal
+import math
+import threading
+from typing import Any, Iterable, Iterator, NamedTuple, Optional
+
+
+class BloomInfo(NamedTuple):
+    checks: int
+    hits: int  # lookups answered by the filter, without loading the partition
+    false_positives: int  # lookups passed by the filter, but the item was missing
+
+
+class BloomStats:
+    """Counters of the bloom filters of a database"""
+
+    def __init__(self, bits_per_key: int = 10):
+        self.bits_per_key = bits_per_key
+
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.hits = 0
+        self.false_positives = 0
+
+    def checked(self, contained: bool):
+        with self._lock:
+            self.checks += 1
+            if not contained:
+                self.hits += 1
+
+    def false_positive(self):
+        with self._lock:
+            self.false_positives += 1
+
+    def info(self) -> BloomInfo:
+        return BloomInfo(
+            checks=self.checks, hits=self.hits, false_positives=self.false_positives
+        )
+
+
+def _encode(key) -> Optional[bytes]:
+    kind = type(key)
+    if kind is str:
+        return b"s" + key.encode("utf-8", "surrogatepass")
+    if kind is bytes:
+        return b"b" + key
+    if kind is int:
+        return b"i" + str(key).encode()
+    return None
+
+
+class BloomFilter:
+    def __init__(
+        self, signature: Any, size: int, hashes: int, bits: Optional[bytes] = None
+    ):
+        self.signature = signature
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray(bits) if bits is not None else bytearray(-(-size // 8))
+
+    @staticmethod
+    def build(
+        signature: Any, keys: Iterable, count: int, bits_per_key: int = 10
+    ) -> Optional["BloomFilter"]:
+        """Filter of the given keys, `None` if a key is not supported"""
+        bloom = BloomFilter(
+            signature,
+            size=max(64, count * bits_per_key),
+            hashes=max(1, round(bits_per_key * math.log(2))),
+        )
+        for key in keys:
+            if not bloom.add(key):
+                return None
+        return bloom
+
+    def _positions(self, key) -> Optional[Iterator[int]]:
+        encoded = _encode(key)
+        if encoded is None:
+            return None
+
+        digest = hashlib.blake2b(encoded, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key) -> bool:
+        """Adds a key, `False` if the key is not supported"""
+        positions = self._positions(key)
+        if positions is None:
+            return False
+
+        for position in positions:
+            self.bits[position >> 3] |= 1 << (position & 7)
+        return True
+
+    def might_contain(self, key) -> bool:
+        positions = self._positions(key)
+        if positions is None:
+            return True
+
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def copy(self, signature: Any) -> "BloomFilter":
+        return BloomFilter(signature, self.size, self.hashes, self.bits)
+
+    def dumps(self) -> bytes:
+        return marshal.dumps((self.signature, self.size, self.hashes, bytes(self.bits)))
+
+    @staticmethod
+    def loads(data: bytes) -> "BloomFilter":
+        signature, size, hashes, bits = marshal.loads(data)
+        return BloomFilter(signature, size, hashes, bits)
@@ -0,0 +1,149 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+
+Signature = Tuple[int, int, int]
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    items: int
+    bytes: int
+
+
+class _Entry(NamedTuple):
+    signature: Any
+    value: Any
+    items: int
+    bytes: int
+
+
+def file_signature(stat: os.stat_result) -> Signature:
+    """Identifies a file version, changes whenever a file is rewritten or replaced."""
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def path_signature(path: Path) -> Optional[Signature]:
+    try:
+        return file_signature(os.stat(path))
+    except FileNotFoundError:
+        return None
+
+
+class PartitionCache:
+    """
+    LRU cache for decoded partitions.
+
+    Entries are validated against a signature of the backing files (mtime, size, inode),
+    so changes from other processes or `Dynafile` instances invalidate stale entries.
+
+    Eviction happens when either budget is exceeded:
+    - `max_items`: number of items summed over all cached partitions
+    - `max_bytes`: on disk size summed over all cached partitions
+
+    A budget of `None` is unlimited.
+
+    Readers pin the values they use, writers must not modify pinned values in place.
+    """
+
+    def __init__(
+        self, max_items: Optional[int] = None, max_bytes: Optional[int] = None
+    ):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._items = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # pin count by id of the pinned value
+        self._pins: Dict[int, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, signature) -> Optional[Any]:
+        """Returns the cached value, if the signature still matches"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.signature != signature:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def put(self, key: Hashable, signature, value, items: int, nbytes: int):
+        with self._lock:
+            self._discard(key)
+
+            if not self._fits(items, nbytes):
+                return
+
+            self._entries[key] = _Entry(signature, value, items, nbytes)
+            self._items += items
+            self._bytes += nbytes
+
+            while self._over_budget():
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._items = 0
+            self._bytes = 0
+
+    def pin(self, value):
+        with self._lock:
+            self._pins[id(value)] = self._pins.get(id(value), 0) + 1
+
+    def unpin(self, value):
+        with self._lock:
+            count = self._pins.pop(id(value)) - 1
+            if count:
+                self._pins[id(value)] = count
+
+    def pinned(self, value) -> bool:
+        with self._lock:
+            return id(value) in self._pins
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            items=self._items,
+            bytes=self._bytes,
+        )
+
+    def _discard(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._items -= entry.items
+            self._bytes -= entry.bytes
+
+    def _fits(self, items: int, nbytes: int) -> bool:
+        if self.max_items is not None and items > self.max_items:
+            return False
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return False
+        return True
+
+    def _over_budget(self) -> bool:
+        if self.max_items is not None and self._items > self.max_items:
+            return True
+        if self.max_bytes is not None and self._bytes > self.max_bytes:
+            return True
+        return False
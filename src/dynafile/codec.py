@@ -0,0 +1,295 @@
+"""
+Codecs for partition files.
+
+A codec writes the sorted tree of a partition segment or local secondary index to a file and reads it back.
+All files of a database have to be written with the same codec, `migrate` rewrites the files of a database
+from one codec to another.
+"""
+
+import abc
+import io
+import marshal
+import mmap
+import os
+import pickle
+import struct
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional, Tuple, Union
+
+from atomicwrites import atomic_write
+from sortedcontainers import SortedDict
+
+from dynafile.lock import partition_lock
+
+
+class Codec(abc.ABC):
+    """Encodes a `SortedDict` into a partition file"""
+
+    @abc.abstractmethod
+    def dump(self, tree: SortedDict, file: BinaryIO):
+        pass
+
+    @abc.abstractmethod
+    def load(self, file: BinaryIO) -> SortedDict:
+        pass
+
+
+class PickleCodec(Codec):
+    """
+    Pickles the whole tree, supports all picklable keys and items.
+
+    Loading a pickle can execute arbitrary code, only load files from trusted sources.
+    """
+
+    def __init__(self, protocol: int = 5):
+        self.protocol = protocol
+
+    def dump(self, tree: SortedDict, file: BinaryIO):
+        pickle.dump(tree, file, protocol=self.protocol)
+
+    def load(self, file: BinaryIO) -> SortedDict:
+        return pickle.load(file)
+
+    def __repr__(self):
+        return f"PickleCodec(protocol={self.protocol})"
+
+
+class RecordCodec(Codec):
+    """
+    Records stored in key order, as a length prefixed block of keys followed by a block of items.
+
+    Keys and items are encoded by `marshal`, which is restricted to plain data types
+    (None, bool, int, float, complex, str, bytes, tuple, list, dict, set, frozenset) and does not execute code on load.
+    Records are already sorted, so the tree is rebuilt with a single linear pass.
+
+    Layout: `MAGIC | length | keys | length | items`, lengths as unsigned 64 bit big endian
+    """
+
+    MAGIC = b"DYNAREC1"
+
+    _length = struct.Struct(">Q")
+
+    def dump(self, tree: SortedDict, file: BinaryIO):
+        file.write(self.MAGIC)
+        for block in (list(tree.keys()), list(tree.values())):
+            data = marshal.dumps(block, 4)
+            file.write(self._length.pack(len(data)))
+            file.write(data)
+
+    def load(self, file: BinaryIO) -> SortedDict:
+        return SortedDict(self.records(file.read()))
+
+    def records(self, data: bytes) -> Iterator[Tuple[Any, Any]]:
+        """Decodes `(key, item)` records of an encoded tree in key order"""
+        if data[: len(self.MAGIC)] != self.MAGIC:
+            raise ValueError("Not a record file")
+
+        blocks = []
+        offset = len(self.MAGIC)
+        for _ in range(2):
+            (length,) = self._length.unpack_from(data, offset)
+            offset += self._length.size
+            blocks.append(marshal.loads(data[offset : offset + length]))
+            offset += length
+
+        keys, items = blocks
+        return zip(keys, items)
+
+    def __repr__(self):
+        return "RecordCodec()"
+
+
+class MappedTree:
+    """
+    Read only view of a file written by `MappedCodec`.
+
+    Lookups binary search the key table and decode only the keys and items they touch.
+    Provides the reading part of the `SortedDict` interface, `copy` returns a `SortedDict`.
+    """
+
+    _entry = struct.Struct(">QQ")
+
+    def __init__(self, data):
+        self._data = memoryview(data)
+        if self._data[: len(MappedCodec.MAGIC)] != MappedCodec.MAGIC:
+            raise ValueError("Not a mapped file")
+
+        footer = len(self._data) - MappedCodec._footer.size
+        self._count, self._table = MappedCodec._footer.unpack_from(self._data, footer)
+
+    def _offsets(self, position: int) -> Tuple[int, int]:
+        return self._entry.unpack_from(
+            self._data, self._table + position * self._entry.size
+        )
+
+    def _key(self, position: int):
+        return marshal.loads(self._data[self._offsets(position)[0] :])
+
+    def _item(self, position: int):
+        return marshal.loads(self._data[self._offsets(position)[1] :])
+
+    def _bisect(self, key, right: bool) -> int:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if (key < self._key(middle)) if right else not (self._key(middle) < key):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _position(self, key) -> Optional[int]:
+        position = self._bisect(key, right=False)
+        if position < self._count and self._key(position) == key:
+            return position
+        return None
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        return self._position(key) is not None
+
+    def __getitem__(self, key):
+        position = self._position(key)
+        if position is None:
+            raise KeyError(key)
+        return self._item(position)
+
+    def get(self, key, default=None):
+        position = self._position(key)
+        if position is None:
+            return default
+        return self._item(position)
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self) -> Iterator:
+        return map(self._key, range(self._count))
+
+    def values(self) -> Iterator:
+        return map(self._item, range(self._count))
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        return ((self._key(i), self._item(i)) for i in range(self._count))
+
+    def _positions(self, minimum, maximum, inclusive, reverse) -> range:
+        start, stop = 0, self._count
+        if minimum is not None:
+            start = self._bisect(minimum, right=not inclusive[0])
+        if maximum is not None:
+            stop = self._bisect(maximum, right=inclusive[1])
+
+        positions = range(start, max(start, stop))
+        return positions[::-1] if reverse else positions
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True), reverse=False):
+        return map(self._key, self._positions(minimum, maximum, inclusive, reverse))
+
+    def irange_values(
+        self, minimum=None, maximum=None, inclusive=(True, True), reverse=False
+    ):
+        """Like `irange`, but yields the values"""
+        return map(self._item, self._positions(minimum, maximum, inclusive, reverse))
+
+    def copy(self) -> SortedDict:
+        return SortedDict(self.items())
+
+
+class MappedCodec(Codec):
+    """
+    Read optimized file format, opened via `mmap`.
+
+    Keys and items are encoded one by one with `marshal` and located by a sorted key table at the end of the file,
+    point lookups and range reads decode only the records they touch.
+    The operating system shares mapped pages between processes.
+
+    Loaded trees are read only `MappedTree` instances, writes decode the whole file into a `SortedDict`.
+
+    Layout: `MAGIC | items | keys | (key offset, item offset) * count | count | table offset`,
+    offsets and count as unsigned 64 bit big endian
+    """
+
+    MAGIC = b"DYNAMAP1"
+
+    _footer = struct.Struct(">QQ")
+
+    def dump(self, tree: SortedDict, file: BinaryIO):
+        offset = file.write(self.MAGIC)
+
+        keys = []
+        item_offsets = []
+        for key, item in tree.items():
+            keys.append(key)
+            item_offsets.append(offset)
+            offset += file.write(marshal.dumps(item, 4))
+
+        key_offsets = []
+        for key in keys:
+            key_offsets.append(offset)
+            offset += file.write(marshal.dumps(key, 4))
+
+        entry = MappedTree._entry.pack
+        file.write(b"".join(map(entry, key_offsets, item_offsets)))
+        file.write(self._footer.pack(len(keys), offset))
+
+    def load(self, file: BinaryIO) -> MappedTree:
+        if os.name == "nt":
+            # mapped files can not be replaced on Windows
+            return MappedTree(file.read())
+
+        try:
+            fileno = file.fileno()
+        except io.UnsupportedOperation:
+            return MappedTree(file.read())
+        return MappedTree(mmap.mmap(fileno, 0, access=mmap.ACCESS_READ))
+
+    def __repr__(self):
+        return "MappedCodec()"
+
+
+def tree_files(path: Union[str, Path]) -> Iterator[Path]:
+    """Files of a database, which are written by its codec"""
+    path = Path(path)
+    for partitions in [path / "_partitions", *path.glob("_gsi-*/_partitions")]:
+        for partition in sorted(partitions.glob("*/")):
+            for file in sorted(partition.glob("*.pickle")):
+                if file.name != "manifest.pickle":
+                    yield file
+
+
+def migrate(
+    path: Union[str, Path],
+    source: Codec,
+    target: Codec,
+    compression: Optional[str] = None,
+) -> int:
+    """
+    Rewrites all partition files of a database from `source` to `target` codec.
+
+    Partitions are locked while they are rewritten, the database has to be opened with `target` afterwards.
+
+    :param compression: compression of the rewritten files, see `dynafile.compression`,
+        defaults to the compression recorded for the database, `"none"` writes uncompressed files
+    :return: number of rewritten files
+    """
+    from dynafile import compression as _compression
+
+    path = Path(path)
+    if compression is None:
+        compression = _compression.recorded(path)
+    target_compression = _compression.compression(compression)
+
+    count = 0
+    for file in tree_files(path):
+        with partition_lock(file.parent).write():
+            with file.open("rb") as f:
+                tree = _compression.load(source, f)
+            with atomic_write(file, mode="wb", overwrite=True) as f:
+                _compression.dump(target, tree, f, target_compression)
+        count += 1
+
+    if compression is not None:
+        _compression.record(path, compression)
+    return count
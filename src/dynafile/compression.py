@@ -0,0 +1,116 @@
+"""
+Compression of partition files.
+
+Compressed files start with a header naming the compression, files without header are read as is.
+So files stay readable, if the compression of a database changes.
+The compression of a database is recorded in its `meta.json`.
+
+`zstd` requires the `zstandard` package.
+"""
+
+import io
+import json
+import lzma
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, NamedTuple, Optional
+
+from atomicwrites import atomic_write
+from sortedcontainers import SortedDict
+
+from dynafile.codec import Codec
+
+MAGIC = b"DYNZ"
+
+
+class Compression(NamedTuple):
+    name: str
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+def _zstd() -> Compression:
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "zstd compression only available if `zstandard` is installed."
+        ) from e
+
+    return Compression(
+        "zstd",
+        lambda data: zstandard.ZstdCompressor().compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+
+
+_COMPRESSIONS: Dict[str, Callable[[], Compression]] = {
+    "zlib": lambda: Compression("zlib", zlib.compress, zlib.decompress),
+    "lzma": lambda: Compression("lzma", lzma.compress, lzma.decompress),
+    "zstd": _zstd,
+}
+
+
+def compression(name: Optional[str]) -> Optional[Compression]:
+    """Compression by name, `None` or `"none"` disable compression"""
+    if name is None or name == "none":
+        return None
+
+    try:
+        factory = _COMPRESSIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown compression: {name}") from None
+    return factory()
+
+
+def _load_meta(path: Path) -> dict:
+    try:
+        return json.loads((path / "meta.json").read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def recorded(path: Path) -> Optional[str]:
+    """Compression recorded for the database at `path`, `None` if none is recorded"""
+    return _load_meta(path).get("compression")
+
+
+def record(path: Path, name: str):
+    """Records the compression of the database at `path`"""
+    meta = _load_meta(path)
+    if meta.get("compression", "none") == name:
+        return
+
+    meta["compression"] = name
+    path.mkdir(parents=True, exist_ok=True)
+    with atomic_write(path / "meta.json", overwrite=True) as file:
+        json.dump(meta, file)
+
+
+def dump(
+    codec: Codec, tree: SortedDict, file: BinaryIO, compression: Optional[Compression]
+):
+    """Encodes the tree with `codec`, compressed if a compression is given"""
+    if compression is None:
+        codec.dump(tree, file)
+        return
+
+    buffer = io.BytesIO()
+    codec.dump(tree, buffer)
+
+    name = compression.name.encode()
+    file.write(MAGIC + bytes([len(name)]) + name)
+    file.write(compression.compress(buffer.getbuffer()))
+
+
+def load(codec: Codec, file: BinaryIO):
+    """Decodes a tree with `codec`, detects the compression by the file header"""
+    if file.read(len(MAGIC)) != MAGIC:
+        file.seek(0)
+        return codec.load(file)
+
+    (length,) = file.read(1)
+    data = file.read()
+    return codec.load(
+        io.BytesIO(compression(data[:length].decode()).decompress(data[length:]))
+    )
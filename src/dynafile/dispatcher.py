@@ -1,4 +1,9 @@
-from typing import NamedTuple, Optional, Callable, NoReturn, List
+import queue
+import threading
+import warnings
+from collections import deque
+from contextlib import contextmanager
+from typing import NamedTuple, Optional, Callable, NoReturn, List, Iterable, Deque
 
 
 class Event(NamedTuple):
@@ -11,12 +16,142 @@ EventListener = Callable[[Event], NoReturn]
 
 
 class Dispatcher:
-    def __init__(self):
+    """
+    Delivers events of saved changes to the listeners.
+
+    Writers schedule events while holding the partition lock, which records their order,
+    and emit them after releasing it, so listeners can access the table.
+    Events scheduled while another thread emits are emitted by that thread, in order.
+
+    Without `queue_size` listeners are called by the emitting thread.
+    Otherwise events are buffered in a bounded queue and delivered by a background thread in batches of `batch_size`,
+    emitting blocks while the queue is full. Errors of listeners are reported as warnings.
+    Events of writes by listeners of the background thread are queued once there is space, it does not wait for itself.
+    """
+
+    def __init__(self, queue_size: Optional[int] = None, batch_size: int = 100):
         self._listeners: List[EventListener] = []
 
-    def emit(self, event: Event):
-        for listener in self._listeners:
-            listener(event)
+        self._queue: Optional[queue.Queue] = None
+        if queue_size is not None:
+            self._queue = queue.Queue(maxsize=queue_size)
+        self._batch_size = batch_size
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+        self._scheduled: Deque[List[Event]] = deque()
+        self._scheduled_lock = threading.Lock()
+        self._emitting = False
+        # threads deferring the emission of their events
+        self._local = threading.local()
+
+    @contextmanager
+    def deferred(self):
+        """Events scheduled by the current thread within the block are emitted after it, not by its writes"""
+        depth = getattr(self._local, "deferred", 0)
+        self._local.deferred = depth + 1
+        try:
+            yield
+        finally:
+            self._local.deferred = depth
+        if not depth:
+            self.emit_scheduled()
+
+    def schedule(self, events: Iterable[Event]):
+        """Records events in order of the changes, to be called while holding the partition lock"""
+        with self._scheduled_lock:
+            self._scheduled.append(list(events))
+
+    def emit_scheduled(self):
+        """Emits the scheduled events in order, to be called after releasing the partition lock"""
+        if getattr(self._local, "deferred", 0):
+            return
+        block = threading.current_thread() is not self._worker
+        while True:
+            with self._scheduled_lock:
+                if self._emitting or not self._scheduled:
+                    return
+                self._emitting = True
+                events = self._scheduled.popleft()
+            # events delivered to failing listeners are not emitted again
+            remaining: List[Event] = []
+            try:
+                remaining = self.emit(events, block=block)
+            finally:
+                with self._scheduled_lock:
+                    if remaining:
+                        # queue is full, the background thread queues them after its next batch
+                        self._scheduled.appendleft(remaining)
+                    self._emitting = False
+            if remaining:
+                return
+
+    def emit(self, events: Iterable[Event], block: bool = True) -> List[Event]:
+        """Delivers or queues the events, returns the events not queued because the queue is full"""
+        if self._queue is None:
+            self._deliver(events)
+            return []
+
+        self._start()
+        events = list(events)
+        for i, event in enumerate(events):
+            try:
+                self._queue.put(event, block=block)
+            except queue.Full:
+                return events[i:]
+        return []
+
+    def _deliver(self, events: Iterable[Event]):
+        for event in events:
+            for listener in self._listeners:
+                listener(event)
+
+    def _start(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="dynafile-stream", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            events = [event for event in batch if event is not None]
+            for event in events:
+                for listener in list(self._listeners):
+                    try:
+                        listener(event)
+                    except Exception as e:
+                        warnings.warn(f"Stream listener failed: {e!r}")
+
+            # events of writes by the listeners, before the batch is done to keep `flush` waiting
+            self.emit_scheduled()
+            for _ in batch:
+                self._queue.task_done()
+            if len(events) < len(batch):
+                return
+
+    def flush(self):
+        """Waits until all emitted events are delivered"""
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self):
+        """Delivers the emitted events and stops the background thread"""
+        self.flush()
+        with self._worker_lock:
+            worker = self._worker
+            self._worker = None
+        if worker is not None and worker.is_alive():
+            self._queue.put(None)
+            worker.join()
 
     def connect(self, listener: EventListener):
         self._listeners.append(listener)
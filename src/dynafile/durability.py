@@ -0,0 +1,148 @@
+"""
+Durability levels of file writes.
+
+- `fsync`: files and directories are synced to disk before a write returns, writes survive power loss
+- `atomic-no-fsync`: files are replaced atomically but not synced, writes survive crashes of the process,
+  but might be lost or reverted on power loss or crashes of the operating system
+- `deferred`: like `atomic-no-fsync`, written files are synced by a background thread every `sync_interval` seconds,
+  bounding the writes lost on power loss
+"""
+
+import os
+import threading
+import warnings
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Optional, Set
+
+from atomicwrites import AtomicWriter, atomic_write
+
+FSYNC = "fsync"
+ATOMIC_NO_FSYNC = "atomic-no-fsync"
+DEFERRED = "deferred"
+
+LEVELS = (FSYNC, ATOMIC_NO_FSYNC, DEFERRED)
+
+
+def sync_directory(directory: Path):
+    if os.name != "posix":
+        return
+
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _UnsyncedWriter(AtomicWriter):
+    """Replaces the file atomically, without syncing file and directory"""
+
+    def sync(self, f):
+        f.flush()
+
+    def commit(self, f):
+        os.replace(f.name, self._path)
+
+
+class Durability:
+    def __init__(self, level: str = FSYNC, sync_interval: float = 1.0):
+        if level not in LEVELS:
+            raise ValueError(f"Unknown durability: {level}")
+        self.level = level
+        self._sync_interval = sync_interval
+
+        # files and directories written since the last sync, in deferred mode
+        self._lock = threading.Lock()
+        self._dirty: Set[Path] = set()
+        self._closed = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    @contextmanager
+    def atomic_write(self, path: Path, mode: str = "wb"):
+        """Replaces the file atomically, synced according to the level"""
+        if self.level == FSYNC:
+            with atomic_write(path, mode=mode, overwrite=True) as file:
+                yield file
+            return
+
+        with atomic_write(
+            path, writer_cls=_UnsyncedWriter, mode=mode, overwrite=True
+        ) as file:
+            yield file
+        self._written(path)
+
+    def sync_file(self, file: BinaryIO):
+        """Syncs an appended file according to the level"""
+        file.flush()
+        if self.level == FSYNC:
+            os.fsync(file.fileno())
+        else:
+            self._written(Path(file.name))
+
+    def sync_directory(self, directory: Path):
+        """Syncs a directory after creating a file, according to the level"""
+        if self.level == FSYNC:
+            sync_directory(directory)
+
+    def _written(self, path: Path):
+        if self.level != DEFERRED:
+            return
+
+        with self._lock:
+            self._dirty.add(path)
+            if self._worker is None and not self._closed.is_set():
+                self._worker = threading.Thread(
+                    target=_sync_periodically,
+                    args=(weakref.ref(self), self._closed, self._sync_interval),
+                    name="dynafile-sync",
+                    daemon=True,
+                )
+                self._worker.start()
+
+    def sync(self):
+        """Syncs the files and directories written since the last sync"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+
+        files = sorted(dirty)
+        directories = sorted({path.parent for path in dirty})
+        for path in files:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                # replaced or removed in the meantime
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        for directory in directories:
+            try:
+                sync_directory(directory)
+            except FileNotFoundError:
+                continue
+
+    def close(self):
+        """Stops the background thread and syncs the remaining files"""
+        self._closed.set()
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.join()
+        self.sync()
+
+
+def _sync_periodically(
+    ref: "weakref.ref[Durability]", closed: threading.Event, interval: float
+):
+    while not closed.wait(interval):
+        durability = ref()
+        if durability is None:
+            return
+        try:
+            durability.sync()
+        except OSError as e:
+            warnings.warn(f"Sync failed: {e!r}")
+        del durability
@@ -0,0 +1,121 @@
+"""
+Reader/writer locks for partitions.
+
+Each partition directory gets one `PartitionLock` per process, shared by all `Dynafile` instances.
+Threads are coordinated by an in-process reader/writer lock, processes by an advisory `flock` on the partition directory.
+"""
+
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # no file locks available (Windows), only threads are coordinated
+    fcntl = None
+
+
+class PartitionLock:
+    """
+    Shared read / exclusive write lock for a partition directory.
+
+    Waiting writers block new readers, so a stream of readers does not starve writers.
+    Locks are not reentrant.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+        # file lock shared by all readers of this process
+        self._read_fd = None
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+
+            if self._readers == 0:
+                self._read_fd = self._lock_file(shared=True)
+            self._readers += 1
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._unlock_file(self._read_fd)
+                    self._read_fd = None
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+
+        try:
+            self._path.mkdir(parents=True, exist_ok=True)
+            fd = self._lock_file(shared=False)
+            try:
+                yield
+            finally:
+                self._unlock_file(fd)
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+    def _lock_file(self, shared: bool):
+        if fcntl is None:
+            return None
+
+        try:
+            fd = os.open(self._path, os.O_RDONLY)
+        except FileNotFoundError:
+            # partition does not exist yet, nothing to protect for readers
+            return None
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    @staticmethod
+    def _unlock_file(fd):
+        if fd is not None:
+            # closing the descriptor releases the lock
+            os.close(fd)
+
+
+_locks: "weakref.WeakValueDictionary[str, PartitionLock]" = (
+    weakref.WeakValueDictionary()
+)
+_locks_guard = threading.Lock()
+
+
+def partition_lock(path: Path) -> PartitionLock:
+    """Returns the lock of a partition directory, shared within the process"""
+    key = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = PartitionLock(Path(key))
+            _locks[key] = lock
+        return lock
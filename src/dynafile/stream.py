@@ -0,0 +1,113 @@
+"""
+Persistent change log of the items of a partition, one shard of the stream of a database.
+
+Events are appended after the changes are saved, as frames `length | pickled (action, new, old) | length`,
+lengths as unsigned 64 bit big endian. The sequence number of a record is the offset of its frame,
+sequence numbers increase within a shard.
+
+A crash during an append can only leave an incomplete frame at the end of the log,
+which is ignored on read and truncated by the next append.
+"""
+
+import os
+import pickle
+import struct
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from dynafile.dispatcher import Event
+from dynafile.durability import Durability
+
+_length = struct.Struct(">Q")
+
+
+class StreamRecord(NamedTuple):
+    shard: str  # partition hash
+    sequence: int
+    event: Event
+
+
+def _frame(event: Event) -> bytes:
+    data = pickle.dumps(tuple(event))
+    length = _length.pack(len(data))
+    return length + data + length
+
+
+def _frames(
+    file: BinaryIO, size: int, start: int = 0
+) -> Iterator[Tuple[int, int, bytes]]:
+    """`(start, end, data)` of the complete frames, beginning at `start`"""
+    position = start
+    while position + 2 * _length.size <= size:
+        file.seek(position)
+        (length,) = _length.unpack(file.read(_length.size))
+        end = position + 2 * _length.size + length
+        if end > size:
+            return
+        data = file.read(length)
+        if file.read(_length.size) != _length.pack(length):
+            return
+        yield position, end, data
+        position = end
+
+
+def _valid_end(file: BinaryIO, size: int) -> int:
+    """End of the last complete frame"""
+    if size >= 2 * _length.size:
+        file.seek(size - _length.size)
+        (length,) = _length.unpack(file.read(_length.size))
+        start = size - 2 * _length.size - length
+        if start >= 0:
+            file.seek(start)
+            if file.read(_length.size) == _length.pack(length):
+                return size
+
+    # the log ends with an incomplete frame, find the end of the last complete one
+    end = 0
+    for _, end, _ in _frames(file, size):
+        pass
+    return end
+
+
+def append_events(
+    path: Path, events: Iterable[Event], durability: Optional[Durability] = None
+):
+    """Append events and sync them to disk"""
+    durability = durability or Durability()
+    created = not path.exists()
+
+    with path.open("ab") as file:
+        size = os.fstat(file.fileno()).st_size
+        with path.open("rb") as reader:
+            end = _valid_end(reader, size)
+        if end < size:
+            file.truncate(end)
+
+        file.write(b"".join(map(_frame, events)))
+        durability.sync_file(file)
+
+    if created:
+        durability.sync_directory(path.parent)
+
+
+def read_events(
+    path: Path, shard: str, after: Optional[int] = None
+) -> Iterator[StreamRecord]:
+    """
+    Records of a shard in order of their sequence numbers.
+
+    :param after: sequence number of the last processed record, to resume from
+    """
+    try:
+        file = path.open("rb")
+    except FileNotFoundError:
+        return
+
+    with file:
+        frames = _frames(file, os.fstat(file.fileno()).st_size, start=after or 0)
+        if after is not None:
+            # skip the last processed record
+            next(frames, None)
+
+        for position, _, data in frames:
+            yield StreamRecord(shard, position, Event(*pickle.loads(data)))
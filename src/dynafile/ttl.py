@@ -0,0 +1,48 @@
+"""
+Expiry index of partitions.
+
+Each partition records a lower bound of the expiry times of its items in `expiry.json`,
+so sweeps skip partitions without expired items without loading them.
+Puts lower the bound, deletes keep it. Sweeps, which load the whole partition, record the exact minimum.
+
+A missing file means the bound is unknown, e.g. for partitions written before expiry was tracked.
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Iterable, Optional
+
+from dynafile.durability import Durability
+
+
+def expiry_of(item: Optional[dict], ttl_attribute: str) -> Optional[float]:
+    """Expiry time of an item, `None` if the item does not expire"""
+    if not item:
+        return None
+    ttl = item.get(ttl_attribute)
+    if isinstance(ttl, (int, float)) and not isinstance(ttl, bool) and ttl:
+        return ttl
+    return None
+
+
+def min_expiry(items: Iterable[Optional[dict]], ttl_attribute: str) -> float:
+    """Earliest expiry time of the items, `math.inf` if no item expires"""
+    return min(
+        filter(None, (expiry_of(item, ttl_attribute) for item in items)),
+        default=math.inf,
+    )
+
+
+def load_expiry(path: Path) -> Optional[float]:
+    """Recorded lower bound of expiry times, `math.inf` if no item expires, `None` if unknown"""
+    try:
+        expires = json.loads(path.read_text())["expires"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+    return math.inf if expires is None else expires
+
+
+def save_expiry(path: Path, expires: float, durability: Optional[Durability] = None):
+    with (durability or Durability()).atomic_write(path, mode="w") as file:
+        json.dump({"expires": None if expires == math.inf else expires}, file)
@@ -0,0 +1,52 @@
+"""
+Append-only log of partition changes.
+
+Records are pickled `(op, key, item)` tuples written one after another.
+A crash during an append can only leave an incomplete record at the end of the log,
+which is ignored on read.
+"""
+
+import os
+import pickle
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, List, Optional, Tuple
+
+from dynafile.durability import Durability
+
+Record = Tuple[str, Any, Optional[dict]]
+
+
+def append_records(
+    path: Path, records: Iterable[Record], durability: Optional[Durability] = None
+) -> os.stat_result:
+    """Append records and sync them to disk, returns the stat of the log file after the append"""
+    durability = durability or Durability()
+    created = not path.exists()
+
+    with path.open("ab") as file:
+        for record in records:
+            pickle.dump(record, file)
+        durability.sync_file(file)
+        stat = os.fstat(file.fileno())
+
+    if created:
+        durability.sync_directory(path.parent)
+
+    return stat
+
+
+def read_records(file: BinaryIO) -> Tuple[List[Record], bool]:
+    """
+    Read all records from an opened log file.
+
+    :return: records and `False` if the log ends with an incomplete record
+    """
+    size = os.fstat(file.fileno()).st_size
+    records = []
+    while file.tell() < size:
+        try:
+            records.append(pickle.load(file))
+        except Exception:
+            return records, False
+
+    return records, True
@@ -0,0 +1,29 @@
+import pytest
+
+from dynafile import _Segment
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Names of the loaded segments"""
+    loads = []
+    original = _Segment._load
+    monkeypatch.setattr(
+        _Segment, "_load", lambda self: loads.append(self.name) or original(self)
+    )
+    return loads
+
+
+@pytest.fixture
+def stores(monkeypatch):
+    """Changes of the stored segments"""
+    stores = []
+    original = _Segment.store
+    monkeypatch.setattr(
+        _Segment,
+        "store",
+        lambda self, data, changes: (
+            stores.append(changes) or original(self, data, changes)
+        ),
+    )
+    return stores
@@ -0,0 +1,161 @@
+import asyncio
+import threading
+
+from dynafile import Dynafile, _WriteBuffer
+from dynafile.aio import AsyncDynafile
+
+
+def test_async_put_get_delete(tmp_path):
+    async def main():
+        async with AsyncDynafile(tmp_path / "db") as db:
+            await db.put_item(item={"PK": "1", "SK": "1", "data": "a"})
+            item = await db.get_item(key={"PK": "1", "SK": "1"})
+            await db.delete_item(key={"PK": "1", "SK": "1"})
+            missing = await db.get_item(key={"PK": "1", "SK": "1"})
+        return item, missing
+
+    item, missing = asyncio.run(main())
+
+    assert item == {"PK": "1", "SK": "1", "data": "a"}
+    assert missing is None
+
+
+def test_async_concurrent_reads_of_a_partition_load_once(tmp_path, loads):
+    db = Dynafile(tmp_path / "db")
+    with db.batch_writer() as writer:
+        for i in range(20):
+            writer.put_item(item={"PK": "1", "SK": str(i)})
+    loads.clear()
+
+    async def main():
+        async with AsyncDynafile(tmp_path / "db") as adb:
+            return await asyncio.gather(
+                *(adb.get_item(key={"PK": "1", "SK": str(i)}) for i in range(20))
+            )
+
+    items = asyncio.run(main())
+
+    assert items == [{"PK": "1", "SK": str(i)} for i in range(20)]
+    assert len(loads) == 1
+
+
+def test_async_reads_wait_for_a_worker_are_joined(tmp_path, loads):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1"})
+    db.put_item(item={"PK": "1", "SK": "2"})
+    loads.clear()
+
+    async def main():
+        async with AsyncDynafile(tmp_path / "db", max_workers=1) as adb:
+            first = asyncio.ensure_future(adb.get_item(key={"PK": "1", "SK": "1"}))
+            await asyncio.sleep(0)
+            # the first read occupies the only worker
+            later = [adb.get_item(key={"PK": "1", "SK": "2"}) for _ in range(5)]
+            return await first, await asyncio.gather(*later)
+
+    first, later = asyncio.run(main())
+
+    assert first == {"PK": "1", "SK": "1"}
+    assert later == [{"PK": "1", "SK": "2"}] * 5
+    assert len(loads) == 2
+
+
+def test_async_batch_get(tmp_path):
+    async def main():
+        async with AsyncDynafile(tmp_path / "db") as db:
+            async with db.batch_writer() as writer:
+                writer.put_item(item={"PK": "1", "SK": "1"})
+                writer.put_item(item={"PK": "2", "SK": "1"})
+
+            return writer.result, await db.batch_get(
+                keys=[
+                    {"PK": "2", "SK": "1"},
+                    {"PK": "3", "SK": "1"},
+                    {"PK": "1", "SK": "1"},
+                ]
+            )
+
+    result, items = asyncio.run(main())
+
+    assert result.actions == 2
+    assert items == [{"PK": "2", "SK": "1"}, None, {"PK": "1", "SK": "1"}]
+
+
+def test_async_read_errors_are_raised_to_all_readers(tmp_path, monkeypatch):
+    def fail(self, keys):
+        raise OSError("disk failure")
+
+    monkeypatch.setattr(Dynafile, "batch_get_item", fail)
+
+    async def main():
+        async with AsyncDynafile(tmp_path / "db") as db:
+            return await asyncio.gather(
+                db.get_item(key={"PK": "1", "SK": "1"}),
+                db.get_item(key={"PK": "1", "SK": "2"}),
+                return_exceptions=True,
+            )
+
+    errors = asyncio.run(main())
+
+    assert [str(e) for e in errors] == ["disk failure", "disk failure"]
+
+
+def test_async_query_iterates_in_chunks(tmp_path):
+    async def main():
+        async with AsyncDynafile(tmp_path / "db") as db:
+            async with db.batch_writer() as writer:
+                for i in range(10):
+                    writer.put_item(item={"PK": "1", "SK": f"{i:02}"})
+
+            result = db.query("1", scan_index_forward=False, limit=5, chunk_size=2)
+            items = [item async for item in result]
+            return items, result.last_evaluated_key
+
+    items, last_evaluated_key = asyncio.run(main())
+
+    assert [item["SK"] for item in items] == ["09", "08", "07", "06", "05"]
+    assert last_evaluated_key == {"PK": "1", "SK": "05"}
+
+
+def test_async_scan(tmp_path):
+    async def main():
+        async with AsyncDynafile(tmp_path / "db") as db:
+            async with db.batch_writer() as writer:
+                for i in range(10):
+                    writer.put_item(item={"PK": str(i), "SK": "1", "even": i % 2 == 0})
+
+            return [item async for item in db.scan(lambda item: item["even"])]
+
+    items = asyncio.run(main())
+
+    assert sorted(item["PK"] for item in items) == ["0", "2", "4", "6", "8"]
+
+
+def test_async_blocking_calls_run_in_executor(tmp_path, monkeypatch):
+    threads = []
+
+    def recorded(original):
+        def call(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return original(*args, **kwargs)
+
+        return call
+
+    monkeypatch.setattr(_WriteBuffer, "flush", recorded(_WriteBuffer.flush))
+    monkeypatch.setattr(Dynafile, "close", recorded(Dynafile.close))
+
+    async def main():
+        async with AsyncDynafile(tmp_path / "db", write_buffer_window=60) as db:
+            await db.put_item(item={"PK": "1", "SK": "1"})
+            query = [item async for item in db.query("1")]
+
+            await db.put_item(item={"PK": "1", "SK": "2"})
+            scan = [item async for item in db.scan()]
+            return query, scan
+
+    query, scan = asyncio.run(main())
+
+    assert len(query) == 1
+    assert len(scan) == 2
+    assert threads
+    assert threading.current_thread() not in threads
@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dynafile import BatchResult, BatchWriteError, Dynafile
+
+
+def test_batch_write_parallel_with_max_workers(tmp_path):
+    db = Dynafile(tmp_path / "db")
+
+    with db.batch_writer(max_workers=4) as writer:
+        for i in range(100):
+            writer.put_item(item={"PK": f"item-{i % 10}", "SK": str(i)})
+
+    assert len(list(db.scan())) == 100
+
+
+def test_batch_write_parallel_with_executor(tmp_path):
+    db = Dynafile(tmp_path / "db")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        with db.batch_writer(executor=pool) as writer:
+            for i in range(100):
+                writer.put_item(item={"PK": f"item-{i % 10}", "SK": str(i)})
+
+    assert len(list(db.scan())) == 100
+
+
+def test_batch_write_parallel_keeps_event_order_per_partition(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    events = []
+    db.add_stream_listener(events.append)
+
+    with db.batch_writer(max_workers=4) as writer:
+        for pk in ["1", "2", "3"]:
+            writer.put_item(item={"PK": pk, "SK": "a", "v": 1})
+            writer.put_item(item={"PK": pk, "SK": "b", "v": 2})
+
+    for pk in ["1", "2", "3"]:
+        assert [event.new["SK"] for event in events if event.new["PK"] == pk] == [
+            "a",
+            "b",
+        ]
+
+
+def test_batch_write_gathers_errors_per_partition(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1"})
+    db.put_item(item={"PK": "2", "SK": "1"})
+
+    with pytest.raises(BatchWriteError) as e:
+        with db.batch_writer(max_workers=2) as writer:
+            # sort keys of different types can not be ordered
+            writer.put_item(item={"PK": "2", "SK": 2})
+            writer.delete_item(key={"PK": "1", "SK": "1"})
+            writer.put_item(item={"PK": "3", "SK": "1"})
+
+    assert set(e.value.errors) == {"2"}
+    assert db.get_item(key={"PK": "1", "SK": "1"}) is None
+    assert db.get_item(key={"PK": "3", "SK": "1"}) is not None
+
+
+def test_batch_write_groups_interleaved_partitions(tmp_path):
+    db = Dynafile(tmp_path / "db")
+
+    with db.batch_writer() as writer:
+        writer.put_item(item={"PK": "1", "SK": "1"})
+        writer.put_item(item={"PK": "2", "SK": "1"})
+        writer.put_item(item={"PK": "1", "SK": "2"})
+
+    assert writer.result.partitions == 2
+    assert len(list(db.query("1"))) == 2
+    assert len(list(db.query("2"))) == 1
+
+
+def test_batch_write_coalesces_actions_per_item(tmp_path):
+    db = Dynafile(tmp_path / "db")
+
+    with db.batch_writer() as writer:
+        writer.put_item(item={"PK": "1", "SK": "1", "v": 1})
+        writer.put_item(item={"PK": "1", "SK": "1", "v": 2})
+        writer.put_item(item={"PK": "1", "SK": "2"})
+        writer.delete_item(key={"PK": "1", "SK": "2"})
+
+    assert writer.result == BatchResult(partitions=1, actions=2, coalesced=2)
+    assert list(db.query("1")) == [{"PK": "1", "SK": "1", "v": 2}]
+
+
+def test_batch_write_loads_partition_once(tmp_path, loads):
+    db = Dynafile(tmp_path / "db")
+
+    with db.batch_writer() as writer:
+        for i in range(10):
+            writer.put_item(item={"PK": str(i % 2), "SK": str(i)})
+
+    assert len(loads) == 2
@@ -0,0 +1,66 @@
+import datetime
+
+import time_machine
+
+from dynafile import Dynafile
+
+
+def test_batch_get_returns_items_in_request_order(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1"})
+    db.put_item(item={"PK": "1", "SK": "2"})
+    db.put_item(item={"PK": "2", "SK": "1"})
+
+    items = db.batch_get_item(
+        keys=[
+            {"PK": "1", "SK": "2"},
+            {"PK": "2", "SK": "1"},
+            {"PK": "3", "SK": "1"},
+            {"PK": "1", "SK": "1"},
+        ]
+    )
+
+    assert items == [
+        {"PK": "1", "SK": "2"},
+        {"PK": "2", "SK": "1"},
+        None,
+        {"PK": "1", "SK": "1"},
+    ]
+
+
+def test_batch_get_loads_partition_once(tmp_path, loads):
+    db = Dynafile(tmp_path / "db")
+    for i in range(10):
+        db.put_item(item={"PK": str(i % 2), "SK": str(i)})
+    loads.clear()
+
+    items = db.batch_get_item(
+        keys=[{"PK": str(i % 2), "SK": str(i)} for i in range(10)]
+    )
+
+    assert len(loads) == 2
+    assert None not in items
+
+
+def test_batch_get_parallel(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    keys = [{"PK": str(i % 10), "SK": str(i)} for i in range(100)]
+    with db.batch_writer() as writer:
+        for key in keys:
+            writer.put_item(item=key)
+
+    assert db.batch_get_item(keys=keys, max_workers=4) == keys
+
+
+@time_machine.travel(datetime.datetime.now(), tick=False)
+def test_batch_get_expires_items(tmp_path):
+    now = datetime.datetime.now()
+    alive = {"PK": "1", "SK": "1", "ttl": now.timestamp() + 1000}
+    expired = {"PK": "1", "SK": "2", "ttl": now.timestamp() - 1000}
+
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl")
+    db.put_item(item=alive)
+    db.put_item(item=expired)
+
+    assert db.batch_get_item(keys=[alive, expired]) == [alive, None]
+    assert list(db.query("1")) == [alive]
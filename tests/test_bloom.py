@@ -0,0 +1,97 @@
+from dynafile import BloomInfo, Dynafile
+from dynafile.bloom import BloomFilter
+
+
+def put_items(db, count):
+    with db.batch_writer() as writer:
+        for i in range(count):
+            writer.put_item(item={"PK": "1", "SK": str(i)})
+
+
+def test_bloom_filter():
+    bloom = BloomFilter.build(None, ["a", b"b", 3], count=3)
+
+    assert bloom.might_contain("a")
+    assert bloom.might_contain(b"b")
+    assert bloom.might_contain(3)
+    assert not bloom.might_contain("b")
+    # other types are never excluded
+    assert bloom.might_contain(3.0)
+    assert BloomFilter.build(None, ["a", 1.5], count=2) is None
+
+
+def test_missing_item_skips_load(tmp_path, loads):
+    db = Dynafile(tmp_path / "db", bloom_filter=True)
+    put_items(db, 100)
+    loads.clear()
+
+    assert db.get_item(key={"PK": "1", "SK": "x"}) is None
+    assert loads == []
+    assert db.bloom_info() == BloomInfo(checks=1, hits=1, false_positives=0)
+
+    assert db.get_item(key={"PK": "1", "SK": "42"}) == {"PK": "1", "SK": "42"}
+    assert db.bloom_info() == BloomInfo(checks=2, hits=1, false_positives=0)
+
+
+def test_batch_get_skips_load(tmp_path, loads):
+    db = Dynafile(tmp_path / "db", bloom_filter=True)
+    put_items(db, 10)
+    loads.clear()
+
+    keys = [{"PK": "1", "SK": "x"}, {"PK": "1", "SK": "y"}]
+    assert db.batch_get_item(keys=keys) == [None, None]
+    assert loads == []
+
+
+def test_false_positives_are_counted(tmp_path, monkeypatch):
+    db = Dynafile(tmp_path / "db", bloom_filter=True)
+    put_items(db, 10)
+    monkeypatch.setattr(BloomFilter, "might_contain", lambda self, key: True)
+
+    assert db.get_item(key={"PK": "1", "SK": "x"}) is None
+    assert db.bloom_info().false_positives == 1
+
+
+def test_bloom_filter_follows_write_log(tmp_path, loads):
+    db = Dynafile(tmp_path / "db", bloom_filter=True, write_log=True)
+    put_items(db, 10)
+    db.put_item(item={"PK": "1", "SK": "new"})
+    loads.clear()
+
+    assert db.get_item(key={"PK": "1", "SK": "new"}) is not None
+    assert db.get_item(key={"PK": "1", "SK": "x"}) is None
+    assert loads == ["data"]
+
+
+def test_outdated_bloom_filter_is_ignored(tmp_path):
+    db = Dynafile(tmp_path / "db", bloom_filter=True)
+    put_items(db, 10)
+
+    Dynafile(tmp_path / "db").put_item(item={"PK": "1", "SK": "new"})
+
+    assert db.get_item(key={"PK": "1", "SK": "new"}) is not None
+    assert db.bloom_info().checks == 0
+
+
+def test_no_bloom_filter_for_unsupported_keys(tmp_path):
+    db = Dynafile(tmp_path / "db", bloom_filter=True)
+    db.put_item(item={"PK": "1", "SK": 1.5})
+
+    assert not list((tmp_path / "db" / "_partitions").glob("*/*.bloom"))
+    assert db.get_item(key={"PK": "1", "SK": 1.5}) is not None
+    assert db.get_item(key={"PK": "1", "SK": 2.5}) is None
+
+
+def test_bloom_filter_per_segment(tmp_path, loads):
+    db = Dynafile(tmp_path / "db", bloom_filter=True, split_max_items=10)
+    put_items(db, 30)
+    assert len(list((tmp_path / "db" / "_partitions").glob("*/*.bloom"))) > 1
+    loads.clear()
+
+    assert db.get_item(key={"PK": "1", "SK": "15x"}) is None
+    assert loads == []
+    assert db.get_item(key={"PK": "1", "SK": "15"}) is not None
+
+
+def test_bloom_info_disabled(tmp_path):
+    assert Dynafile(tmp_path / "db").bloom_info() is None
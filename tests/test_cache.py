@@ -0,0 +1,86 @@
+from dynafile import Dynafile
+
+
+def test_cache_disabled_by_default(tmp_path):
+    db = Dynafile(tmp_path / "db")
+
+    assert db.cache_info() is None
+
+
+def test_cache_hit_on_second_read(tmp_path):
+    db = Dynafile(tmp_path / "db", cache_max_items=100)
+    db.put_item(item={"PK": "1", "SK": "1"})
+
+    db.get_item(key={"PK": "1", "SK": "1"})
+    db.get_item(key={"PK": "1", "SK": "1"})
+
+    info = db.cache_info()
+    assert info.hits == 2  # put_item populates the cache
+    assert info.misses == 0
+    assert info.items == 1
+
+
+def test_cache_invalidated_by_external_write(tmp_path):
+    db = Dynafile(tmp_path / "db", cache_max_items=100)
+    db.put_item(item={"PK": "1", "SK": "1", "name": "old"})
+    assert db.get_item(key={"PK": "1", "SK": "1"})["name"] == "old"
+
+    other = Dynafile(tmp_path / "db")
+    other.put_item(item={"PK": "1", "SK": "1", "name": "new"})
+
+    assert db.get_item(key={"PK": "1", "SK": "1"})["name"] == "new"
+    assert db.cache_info().misses == 1
+
+
+def test_cache_evicts_least_recently_used_by_items(tmp_path):
+    db = Dynafile(tmp_path / "db", cache_max_items=2)
+    db.put_item(item={"PK": "1", "SK": "1"})
+    db.put_item(item={"PK": "2", "SK": "1"})
+    db.get_item(key={"PK": "1", "SK": "1"})
+
+    db.put_item(item={"PK": "3", "SK": "1"})
+
+    info = db.cache_info()
+    assert info.evictions == 1
+    assert info.items == 2
+
+    db.get_item(key={"PK": "1", "SK": "1"})
+    assert db.cache_info().misses == 0
+
+    db.get_item(key={"PK": "2", "SK": "1"})
+    assert db.cache_info().misses == 1
+
+
+def test_cache_evicts_by_bytes(tmp_path):
+    db = Dynafile(tmp_path / "db", cache_max_bytes=3000)
+    db.put_item(item={"PK": "1", "SK": "1", "data": b"0" * 1024})
+    db.put_item(item={"PK": "2", "SK": "1", "data": b"0" * 1024})
+    db.put_item(item={"PK": "3", "SK": "1", "data": b"0" * 1024})
+
+    info = db.cache_info()
+    assert info.evictions == 1
+    assert info.bytes <= 3000
+
+
+def test_cache_skips_partitions_exceeding_budget(tmp_path):
+    db = Dynafile(tmp_path / "db", cache_max_bytes=100)
+    db.put_item(item={"PK": "1", "SK": "1", "data": b"0" * 1024})
+
+    assert db.get_item(key={"PK": "1", "SK": "1"}) is not None
+    assert db.cache_info().items == 0
+
+
+def test_cache_not_affected_by_changed_items(tmp_path):
+    db = Dynafile(tmp_path / "db", cache_max_items=100)
+    item = {"PK": "1", "SK": "1", "v": 1}
+    db.put_item(item=item)
+    item["v"] = 2
+
+    assert db.get_item(key={"PK": "1", "SK": "1"})["v"] == 1
+
+    db.get_item(key={"PK": "1", "SK": "1"})["v"] = 3
+    next(iter(db.query("1")))["v"] = 4
+    next(iter(db.scan()))["v"] = 5
+
+    assert db.get_item(key={"PK": "1", "SK": "1"})["v"] == 1
+    assert db.cache_info().hits > 0
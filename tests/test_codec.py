@@ -0,0 +1,180 @@
+import io
+from decimal import Decimal
+
+import pytest
+from sortedcontainers import SortedDict
+
+from dynafile import (
+    Codec,
+    Dynafile,
+    GlobalSecondaryIndex,
+    LocalSecondaryIndex,
+    MappedCodec,
+    PickleCodec,
+    RecordCodec,
+)
+from dynafile.codec import MappedTree, migrate
+
+CODECS = [PickleCodec(), RecordCodec(), MappedCodec()]
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=repr)
+def test_codec_round_trip(codec):
+    tree = SortedDict(
+        {
+            "a": {"PK": "1", "SK": "a", "data": b"\x00\xff", "n": [1, 2.5, None]},
+            "b": {"PK": "1", "SK": "b", "nested": {"set": {1, 2}, "flag": True}},
+        }
+    )
+
+    file = io.BytesIO()
+    codec.dump(tree, file)
+    file.seek(0)
+
+    assert dict(codec.load(file).items()) == tree
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=repr)
+def test_codec_empty_tree(codec):
+    file = io.BytesIO()
+    codec.dump(SortedDict(), file)
+    file.seek(0)
+
+    assert len(codec.load(file)) == 0
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=repr)
+def test_db_with_codec(tmp_path, codec):
+    db = Dynafile(
+        tmp_path / "db",
+        codec=codec,
+        split_max_items=4,
+        local_indexes=[LocalSecondaryIndex("by_n", sk_attribute="n")],
+    )
+    with db.batch_writer() as writer:
+        for i in range(10):
+            writer.put_item(item={"PK": "1", "SK": f"{i:02}", "n": -i})
+
+    db = Dynafile(
+        tmp_path / "db",
+        codec=codec,
+        local_indexes=[LocalSecondaryIndex("by_n", sk_attribute="n")],
+    )
+    assert db.get_item(key={"PK": "1", "SK": "03"}) == {"PK": "1", "SK": "03", "n": -3}
+    assert [i["n"] for i in db.query("1", index_name="by_n", lt=-7)] == [-9, -8]
+
+
+def test_record_codec_does_not_pickle(tmp_path):
+    db = Dynafile(tmp_path / "db", codec=RecordCodec())
+    db.put_item(item={"PK": "1", "SK": "1"})
+
+    (file,) = (tmp_path / "db" / "_partitions").glob("*/data.pickle")
+    assert file.read_bytes().startswith(RecordCodec.MAGIC)
+
+    with pytest.raises(ValueError):
+        Dynafile(tmp_path / "db", codec=RecordCodec()).put_item(
+            item={"PK": "1", "SK": "2", "price": Decimal("1.5")}
+        )
+    assert db.get_item(key={"PK": "1", "SK": "2"}) is None
+
+
+def test_record_codec_rejects_other_files(tmp_path):
+    Dynafile(tmp_path / "db").put_item(item={"PK": "1", "SK": "1"})
+
+    with pytest.raises(ValueError):
+        Dynafile(tmp_path / "db", codec=RecordCodec()).get_item(
+            key={"PK": "1", "SK": "1"}
+        )
+
+
+def test_incomplete_codec_fails_on_creation():
+    class DumpOnly(Codec):
+        def dump(self, tree, file):
+            pass
+
+    with pytest.raises(TypeError):
+        DumpOnly()
+
+
+def test_migrate(tmp_path):
+    db = Dynafile(
+        tmp_path / "db",
+        split_max_items=2,
+        local_indexes=[LocalSecondaryIndex("by_n", sk_attribute="n")],
+    )
+    with db.batch_writer() as writer:
+        for i in range(5):
+            writer.put_item(item={"PK": str(i % 2), "SK": str(i), "n": i})
+
+    assert migrate(tmp_path / "db", PickleCodec(), RecordCodec()) == 6
+
+    db = Dynafile(
+        tmp_path / "db",
+        codec=RecordCodec(),
+        local_indexes=[LocalSecondaryIndex("by_n", sk_attribute="n")],
+    )
+    assert [i["n"] for i in db.query("0")] == [0, 2, 4]
+    assert [i["n"] for i in db.query("1", index_name="by_n")] == [1, 3]
+
+
+@pytest.fixture
+def mapped_db(tmp_path):
+    db = Dynafile(
+        tmp_path / "db",
+        codec=MappedCodec(),
+        global_indexes=[
+            GlobalSecondaryIndex("by_g", pk_attribute="g", sk_attribute="n")
+        ],
+    )
+    with db.batch_writer() as writer:
+        for i in range(100):
+            writer.put_item(item={"PK": "1", "SK": f"{i:03}", "g": "x", "n": i % 10})
+    return db
+
+
+def test_mapped_codec_loads_read_only_trees(mapped_db):
+    partition = mapped_db._get_partition("1")
+    with partition.read_access() as view:
+        (tree,) = view.trees.values()
+    assert isinstance(tree, MappedTree)
+
+
+def test_mapped_codec_lookups(mapped_db):
+    db = mapped_db
+    assert db.get_item(key={"PK": "1", "SK": "042"})["n"] == 2
+    assert db.get_item(key={"PK": "1", "SK": "0420"}) is None
+    assert db.get_item(key={"PK": "1", "SK": "999"}) is None
+
+    def sks(**kwargs):
+        return [item["SK"] for item in db.query("1", **kwargs)]
+
+    assert sks(begins_with="04") == [f"04{i}" for i in range(10)]
+    assert sks(gt="097") == ["098", "099"]
+    assert sks(lt="002", scan_index_forward=False) == ["001", "000"]
+    assert sks(between=("050", "052")) == ["050", "051", "052"]
+    assert sks(gt="5") == []
+    assert sks(limit=2, exclusive_start_key={"PK": "1", "SK": "010"}) == ["011", "012"]
+
+    assert len(list(db.query("x", index_name="by_g", between=(3, 4)))) == 20
+
+
+def test_mapped_codec_writes(mapped_db, tmp_path):
+    db = mapped_db
+    db.put_item(item={"PK": "1", "SK": "042", "g": "y", "n": 0})
+    db.delete_item(key={"PK": "1", "SK": "043"})
+
+    assert db.get_item(key={"PK": "1", "SK": "042"})["g"] == "y"
+    assert db.get_item(key={"PK": "1", "SK": "043"}) is None
+    assert len(list(db.scan())) == 99
+    assert len(list(db.query("x", index_name="by_g"))) == 98
+
+
+def test_mapped_codec_with_write_log(tmp_path):
+    db = Dynafile(tmp_path / "db", codec=MappedCodec(), write_log=True)
+    with db.batch_writer() as writer:
+        for i in range(10):
+            writer.put_item(item={"PK": "1", "SK": str(i)})
+    db.delete_item(key={"PK": "1", "SK": "3"})
+
+    assert db.get_item(key={"PK": "1", "SK": "3"}) is None
+    assert len(list(db.query("1"))) == 9
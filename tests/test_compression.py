@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from dynafile import Dynafile, MappedCodec, PickleCodec, RecordCodec
+from dynafile.codec import migrate
+from dynafile.compression import MAGIC
+
+
+def data_file(tmp_path):
+    (path,) = (tmp_path / "db" / "_partitions").glob("*/data.pickle")
+    return path
+
+
+def put_items(db):
+    with db.batch_writer() as writer:
+        for i in range(100):
+            writer.put_item(item={"PK": "1", "SK": f"{i:03}", "data": "abc" * 100})
+
+
+@pytest.mark.parametrize("compression", ["zlib", "lzma"])
+@pytest.mark.parametrize(
+    "codec", [PickleCodec(), RecordCodec(), MappedCodec()], ids=repr
+)
+def test_compressed_partition(tmp_path, compression, codec):
+    db = Dynafile(tmp_path / "db", compression=compression, codec=codec)
+    put_items(db)
+
+    assert data_file(tmp_path).read_bytes().startswith(MAGIC)
+    assert data_file(tmp_path).stat().st_size < 100 * 300
+    assert db.get_item(key={"PK": "1", "SK": "042"})["data"] == "abc" * 100
+    assert len(list(db.query("1", begins_with="04"))) == 10
+
+
+def test_compression_is_recorded(tmp_path):
+    put_items(Dynafile(tmp_path / "db", compression="zlib"))
+    assert json.loads((tmp_path / "db" / "meta.json").read_text()) == {
+        "compression": "zlib"
+    }
+
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "2", "SK": "1"})
+    for path in (tmp_path / "db" / "_partitions").glob("*/data.pickle"):
+        assert path.read_bytes().startswith(MAGIC)
+
+
+def test_uncompressed_data_stays_readable(tmp_path):
+    put_items(Dynafile(tmp_path / "db"))
+
+    db = Dynafile(tmp_path / "db", compression="lzma")
+    assert len(list(db.query("1"))) == 100
+
+    db.put_item(item={"PK": "1", "SK": "100"})
+    assert data_file(tmp_path).read_bytes().startswith(MAGIC)
+
+    db = Dynafile(tmp_path / "db", compression="none")
+    assert len(list(db.query("1"))) == 101
+
+
+def test_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        Dynafile(tmp_path / "db", compression="gzip")
+    assert not (tmp_path / "db" / "meta.json").exists()
+
+
+def test_migrate_compression(tmp_path):
+    put_items(Dynafile(tmp_path / "db"))
+
+    assert migrate(tmp_path / "db", PickleCodec(), PickleCodec(), "zlib") == 1
+    assert data_file(tmp_path).read_bytes().startswith(MAGIC)
+    assert len(list(Dynafile(tmp_path / "db").query("1"))) == 100
+
+
+def test_migrate_keeps_recorded_compression(tmp_path):
+    put_items(Dynafile(tmp_path / "db", compression="zlib"))
+
+    assert migrate(tmp_path / "db", PickleCodec(), RecordCodec()) == 1
+    assert data_file(tmp_path).read_bytes().startswith(MAGIC)
+    assert len(list(Dynafile(tmp_path / "db", codec=RecordCodec()).query("1"))) == 100
+
+    migrate(tmp_path / "db", RecordCodec(), RecordCodec(), "none")
+    assert not data_file(tmp_path).read_bytes().startswith(MAGIC)
+    assert json.loads((tmp_path / "db" / "meta.json").read_text()) == {
+        "compression": "none"
+    }
@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from dynafile import Dynafile
+
+
+def put_items(path, worker, count):
+    db = Dynafile(path)
+    for i in range(count):
+        db.put_item(item={"PK": "1", "SK": f"{worker}-{i}"})
+
+
+def test_threads_do_not_lose_updates(tmp_path):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for worker in range(8):
+            pool.submit(put_items, tmp_path / "db", worker, 20)
+
+    db = Dynafile(tmp_path / "db")
+    assert len(list(db.query("1"))) == 8 * 20
+
+
+def test_processes_do_not_lose_updates(tmp_path):
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        futures = [
+            pool.submit(put_items, tmp_path / "db", worker, 20) for worker in range(4)
+        ]
+        for future in futures:
+            future.result()
+
+    db = Dynafile(tmp_path / "db")
+    assert len(list(db.query("1"))) == 4 * 20
+
+
+def test_readers_do_not_block_each_other(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1"})
+    partition = db._get_partition("1")
+
+    entered = threading.Event()
+
+    def read():
+        with partition._lock.read():
+            entered.set()
+
+    with partition._lock.read():
+        thread = threading.Thread(target=read)
+        thread.start()
+        assert entered.wait(timeout=5)
+    thread.join()
+
+
+def test_writers_to_different_partitions_run_in_parallel(tmp_path):
+    db = Dynafile(tmp_path / "db")
+
+    done = threading.Event()
+
+    def write():
+        db.put_item(item={"PK": "2", "SK": "1"})
+        done.set()
+
+    with db._get_partition("1").write_access():
+        thread = threading.Thread(target=write)
+        thread.start()
+        assert done.wait(timeout=5)
+    thread.join()
+
+
+def test_writer_waits_for_readers(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    partition = db._get_partition("1")
+
+    done = threading.Event()
+
+    def write():
+        db.put_item(item={"PK": "1", "SK": "1"})
+        done.set()
+
+    with partition._lock.read():
+        thread = threading.Thread(target=write)
+        thread.start()
+        assert not done.wait(timeout=0.2)
+
+    assert done.wait(timeout=5)
+    thread.join()
+
+
+def test_writes_do_not_modify_read_snapshot(tmp_path):
+    db = Dynafile(tmp_path / "db", cache_max_items=100)
+    db.put_item(item={"PK": "1", "SK": "a"})
+    db.put_item(item={"PK": "1", "SK": "c"})
+
+    items = db.query("1")
+    assert next(items)["SK"] == "a"
+
+    db.put_item(item={"PK": "1", "SK": "b"})
+    db.delete_item(key={"PK": "1", "SK": "c"})
+
+    assert [i["SK"] for i in items] == ["c"]
+    assert [i["SK"] for i in db.query("1")] == ["a", "b"]
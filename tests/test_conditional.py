@@ -0,0 +1,144 @@
+import datetime
+
+import pytest
+import time_machine
+
+from dynafile import (
+    Action,
+    ActionType,
+    BatchWriteError,
+    ConditionalCheckFailed,
+    Dynafile,
+)
+
+
+def test_put_item_if_not_exists(tmp_path, stores):
+    events = []
+    db = Dynafile(tmp_path / "db")
+    db.add_stream_listener(events.append)
+    db.put_item(item={"PK": "1", "SK": "1", "v": 1}, condition=lambda item: not item)
+    stores.clear()
+    events.clear()
+
+    with pytest.raises(ConditionalCheckFailed) as e:
+        db.put_item(
+            item={"PK": "1", "SK": "1", "v": 2}, condition=lambda item: not item
+        )
+
+    assert e.value.item == {"PK": "1", "SK": "1", "v": 1}
+    assert stores == []
+    assert events == []
+    assert db.get_item(key={"PK": "1", "SK": "1"})["v"] == 1
+
+
+def test_put_item_with_string_condition(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1", "version": 1})
+
+    db.put_item(item={"PK": "1", "SK": "1", "version": 2}, condition="version == 1")
+
+    with pytest.raises(ConditionalCheckFailed):
+        db.put_item(item={"PK": "1", "SK": "1", "version": 2}, condition="version == 1")
+
+    assert db.get_item(key={"PK": "1", "SK": "1"})["version"] == 2
+
+
+def test_delete_item_with_condition(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1", "locked": True})
+
+    with pytest.raises(ConditionalCheckFailed):
+        db.delete_item(
+            key={"PK": "1", "SK": "1"}, condition=lambda item: not item["locked"]
+        )
+    assert db.get_item(key={"PK": "1", "SK": "1"})
+
+    db.delete_item(key={"PK": "1", "SK": "1"}, condition=lambda item: item["locked"])
+    assert db.get_item(key={"PK": "1", "SK": "1"}) is None
+
+
+def test_update_item_with_condition(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1", "stock": 1})
+
+    def in_stock(item):
+        return item.get("stock", 0) > 0
+
+    db.update_item(key={"PK": "1", "SK": "1"}, add={"stock": -1}, condition=in_stock)
+    with pytest.raises(ConditionalCheckFailed):
+        db.update_item(
+            key={"PK": "1", "SK": "1"}, add={"stock": -1}, condition=in_stock
+        )
+
+    assert db.get_item(key={"PK": "1", "SK": "1"})["stock"] == 0
+
+
+def test_batch_with_failed_condition_skips_partition(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1"})
+
+    with pytest.raises(BatchWriteError) as e:
+        with db.batch_writer() as writer:
+            writer.put_item(item={"PK": "1", "SK": "2"})
+            writer.put_item(item={"PK": "1", "SK": "1"}, condition=lambda i: not i)
+            writer.put_item(item={"PK": "2", "SK": "1"})
+
+    assert isinstance(e.value.errors["1"], ConditionalCheckFailed)
+    assert db.get_item(key={"PK": "1", "SK": "2"}) is None
+    assert db.get_item(key={"PK": "2", "SK": "1"})
+
+
+def test_execute_batch_with_conditions(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1", "v": 1})
+
+    result = db.execute_batch(
+        [
+            Action(ActionType.PUT, {"PK": "1", "SK": "1", "v": 2}, "v == 1"),
+            Action(ActionType.DELETE, {"PK": "1", "SK": "2"}, lambda item: not item),
+        ]
+    )
+
+    assert result.actions == 2
+    assert db.get_item(key={"PK": "1", "SK": "1"})["v"] == 2
+
+
+def test_conditional_writes_are_not_buffered(tmp_path):
+    with Dynafile(tmp_path / "db", write_buffer_window=60) as db:
+        db.put_item(item={"PK": "1", "SK": "1"})
+
+        with pytest.raises(ConditionalCheckFailed):
+            db.put_item(item={"PK": "1", "SK": "1"}, condition=lambda item: not item)
+
+        db.put_item(item={"PK": "1", "SK": "2"}, condition=lambda item: not item)
+        assert Dynafile(tmp_path / "db").get_item(key={"PK": "1", "SK": "2"})
+
+
+@time_machine.travel(datetime.datetime.now(), tick=False)
+def test_condition_treats_expired_items_as_missing(tmp_path):
+    now = datetime.datetime.now().timestamp()
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl")
+    db.put_item(item={"PK": "1", "SK": "1", "ttl": now - 1000})
+
+    db.put_item(item={"PK": "1", "SK": "1"}, condition=lambda item: not item)
+
+    assert db.get_item(key={"PK": "1", "SK": "1"}) == {"PK": "1", "SK": "1"}
+
+
+@pytest.mark.parametrize("conditional", [0, 1])
+def test_batch_rejects_coalesced_conditions(tmp_path, conditional):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1", "version": 5})
+
+    actions = [
+        Action(ActionType.PUT, {"PK": "1", "SK": "1", "version": 2}),
+        Action(ActionType.PUT, {"PK": "1", "SK": "1", "version": 3}),
+        Action(ActionType.PUT, {"PK": "2", "SK": "1"}),
+    ]
+    actions[conditional] = actions[conditional]._replace(condition="version == 1")
+
+    with pytest.raises(ValueError):
+        db.execute_batch(actions)
+
+    assert db.get_item(key={"PK": "1", "SK": "1"})["version"] == 5
+    assert db.get_item(key={"PK": "2", "SK": "1"}) is None
@@ -0,0 +1,81 @@
+import os
+import time
+
+import atomicwrites
+import pytest
+
+from dynafile import Dynafile
+
+LEVELS = ["fsync", "atomic-no-fsync", "deferred"]
+
+
+@pytest.fixture
+def fsyncs(monkeypatch):
+    fsyncs = []
+    original = os.fsync
+
+    def fsync(fd):
+        fsyncs.append(fd)
+        original(fd)
+
+    monkeypatch.setattr(os, "fsync", fsync)
+    monkeypatch.setattr(atomicwrites, "_proper_fsync", fsync)
+    return fsyncs
+
+
+@pytest.mark.parametrize("durability", LEVELS)
+@pytest.mark.parametrize("write_log", [False, True])
+def test_durability_levels_store_items(tmp_path, durability, write_log):
+    db = Dynafile(tmp_path / "db", durability=durability, write_log=write_log)
+    db.put_item(item={"PK": "1", "SK": "1"})
+    db.put_item(item={"PK": "1", "SK": "2"})
+    db.delete_item(key={"PK": "1", "SK": "1"})
+    db.close()
+
+    assert list(Dynafile(tmp_path / "db").query("1")) == [{"PK": "1", "SK": "2"}]
+
+
+def test_unknown_durability(tmp_path):
+    with pytest.raises(ValueError):
+        Dynafile(tmp_path / "db", durability="never")
+
+
+def test_fsync_syncs_every_write(tmp_path, fsyncs):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1"})
+
+    assert fsyncs
+
+
+@pytest.mark.parametrize("write_log", [False, True])
+def test_atomic_no_fsync_does_not_sync(tmp_path, fsyncs, write_log):
+    db = Dynafile(tmp_path / "db", durability="atomic-no-fsync", write_log=write_log)
+    for i in range(3):
+        db.put_item(item={"PK": "1", "SK": str(i)})
+    db.close()
+
+    assert fsyncs == []
+
+
+def test_deferred_syncs_on_close(tmp_path, fsyncs):
+    db = Dynafile(tmp_path / "db", durability="deferred", sync_interval=60)
+    for i in range(3):
+        db.put_item(item={"PK": "1", "SK": str(i)})
+
+    assert fsyncs == []
+
+    db.close()
+
+    # partition file and its directory
+    assert len(fsyncs) == 2
+
+
+def test_deferred_syncs_in_background(tmp_path, fsyncs):
+    db = Dynafile(tmp_path / "db", durability="deferred", sync_interval=0.01)
+    db.put_item(item={"PK": "1", "SK": "1"})
+
+    deadline = time.time() + 5
+    while not fsyncs:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    db.close()
@@ -1,3 +1,7 @@
+import threading
+
+import pytest
+
 from dynafile import Dynafile, Event
 
 
@@ -54,15 +58,83 @@ def test_delete_item_schedules_event(tmp_path):
 
 def test_batch_write_item_schedules_event(tmp_path):
     db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "bb"})
     observer = Observer()
     db.add_stream_listener(observer)
 
     with db.batch_writer() as writer:
         writer.put_item(item={"PK": "1", "SK": "aa"})
-        writer.delete_item(key={"PK": "1", "SK": "aa"})
+        writer.delete_item(key={"PK": "1", "SK": "bb"})
 
     args, kwargs = observer.calls[0]
     assert args[0] == Event(action="PUT", new={"PK": "1", "SK": "aa"}, old=None)
 
     args, kwargs = observer.calls[1]
-    assert args[0] == Event(action="DELETE", new=None, old={"PK": "1", "SK": "aa"})
+    assert args[0] == Event(action="DELETE", new=None, old={"PK": "1", "SK": "bb"})
+
+
+def test_batch_write_item_schedules_event_for_last_action_only(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "aa", "v": 0})
+    observer = Observer()
+    db.add_stream_listener(observer)
+
+    with db.batch_writer() as writer:
+        writer.put_item(item={"PK": "1", "SK": "aa", "v": 1})
+        writer.put_item(item={"PK": "1", "SK": "aa", "v": 2})
+
+    assert len(observer.calls) == 1
+    args, kwargs = observer.latest
+    assert args[0] == Event(
+        action="PUT",
+        new={"PK": "1", "SK": "aa", "v": 2},
+        old={"PK": "1", "SK": "aa", "v": 0},
+    )
+
+
+def test_delete_missing_item_schedules_no_event(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    observer = Observer()
+    db.add_stream_listener(observer)
+
+    db.delete_item(key={"PK": "1", "SK": "aa"})
+
+    assert observer.calls == []
+
+
+def test_listener_can_access_table(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    seen = []
+
+    def listener(event: Event):
+        seen.append(db.get_item(key={"PK": "1", "SK": event.new["SK"]}))
+        if event.new["SK"] == "aa":
+            db.put_item(item={"PK": "1", "SK": "bb"})
+
+    db.add_stream_listener(listener)
+    writer = threading.Thread(
+        target=db.put_item, kwargs={"item": {"PK": "1", "SK": "aa"}}
+    )
+    writer.start()
+    writer.join(timeout=5)
+
+    assert not writer.is_alive()
+    assert seen == [{"PK": "1", "SK": "aa"}, {"PK": "1", "SK": "bb"}]
+
+
+def test_failing_listener_does_not_receive_events_again(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    seen = []
+
+    def listener(event: Event):
+        seen.append(event.new["SK"])
+        if event.new["SK"] == "1":
+            raise ValueError("boom")
+
+    db.add_stream_listener(listener)
+    with pytest.raises(ValueError):
+        db.put_item(item={"PK": "1", "SK": "1"})
+    db.put_item(item={"PK": "1", "SK": "2"})
+
+    assert seen == ["1", "2"]
+    assert db.get_item(key={"PK": "1", "SK": "1"})
@@ -0,0 +1,173 @@
+import pytest
+
+from dynafile import Dynafile, GlobalSecondaryIndex, _IndexTable
+
+BY_EMAIL = GlobalSecondaryIndex("by_email", pk_attribute="email")
+BY_ROLE = GlobalSecondaryIndex("by_role", pk_attribute="role", sk_attribute="name")
+
+
+def test_query_index(tmp_path):
+    db = Dynafile(tmp_path / "db", global_indexes=[BY_EMAIL])
+    alice = {"PK": "user#1", "SK": "user", "email": "alice@example.com"}
+    db.put_item(item=alice)
+    db.put_item(item={"PK": "user#2", "SK": "user", "email": "bob@example.com"})
+
+    assert list(db.query("alice@example.com", index_name="by_email")) == [alice]
+
+
+def test_index_is_sparse(tmp_path):
+    db = Dynafile(tmp_path / "db", global_indexes=[BY_EMAIL])
+    db.put_item(item={"PK": "user#1", "SK": "user"})
+
+    assert not (tmp_path / "db" / "_gsi-by_email").exists()
+
+
+def test_index_follows_updates_and_deletes(tmp_path):
+    db = Dynafile(tmp_path / "db", global_indexes=[BY_EMAIL])
+    db.put_item(item={"PK": "user#1", "SK": "user", "email": "old@example.com"})
+    db.put_item(item={"PK": "user#1", "SK": "user", "email": "new@example.com"})
+
+    assert list(db.query("old@example.com", index_name="by_email")) == []
+    assert len(list(db.query("new@example.com", index_name="by_email"))) == 1
+
+    db.delete_item(key={"PK": "user#1", "SK": "user"})
+    assert list(db.query("new@example.com", index_name="by_email")) == []
+
+
+def test_index_sort_key_conditions(tmp_path):
+    db = Dynafile(tmp_path / "db", global_indexes=[BY_ROLE])
+    with db.batch_writer() as writer:
+        for i, name in enumerate(["anna", "bert", "berta", "carl"]):
+            writer.put_item(
+                item={"PK": f"user#{i}", "SK": "user", "role": "admin", "name": name}
+            )
+        writer.put_item(
+            item={"PK": "user#9", "SK": "user", "role": "guest", "name": "bert"}
+        )
+
+    def names(**kwargs):
+        return [i["name"] for i in db.query("admin", index_name="by_role", **kwargs)]
+
+    assert names() == ["anna", "bert", "berta", "carl"]
+    assert names(begins_with="ber") == ["bert", "berta"]
+    assert names(gt="bert") == ["berta", "carl"]
+    assert names(lte="bert") == ["anna", "bert"]
+    assert names(lt="bert", scan_index_forward=False) == ["anna"]
+
+
+def test_index_allows_duplicate_index_keys(tmp_path):
+    db = Dynafile(tmp_path / "db", global_indexes=[BY_ROLE])
+    db.put_item(item={"PK": "user#1", "SK": "user", "role": "admin", "name": "anna"})
+    db.put_item(item={"PK": "user#2", "SK": "user", "role": "admin", "name": "anna"})
+
+    assert (
+        len(list(db.query("admin", index_name="by_role", between=("anna", "anna"))))
+        == 2
+    )
+
+
+def test_index_pagination(tmp_path):
+    db = Dynafile(tmp_path / "db", global_indexes=[BY_ROLE])
+    for i in range(5):
+        db.put_item(
+            item={"PK": f"user#{i}", "SK": "user", "role": "admin", "name": "anna"}
+        )
+
+    page = db.query("admin", index_name="by_role", limit=3)
+    first = [i["PK"] for i in page]
+    page = db.query(
+        "admin",
+        index_name="by_role",
+        limit=3,
+        exclusive_start_key=page.last_evaluated_key,
+    )
+    second = [i["PK"] for i in page]
+
+    assert first + second == [f"user#{i}" for i in range(5)]
+
+
+def test_backfill_index(tmp_path):
+    Dynafile(tmp_path / "db").put_item(
+        item={"PK": "user#1", "SK": "user", "email": "alice@example.com"}
+    )
+
+    db = Dynafile(tmp_path / "db", global_indexes=[BY_EMAIL])
+    assert list(db.query("alice@example.com", index_name="by_email")) == []
+
+    db.backfill_index("by_email")
+    assert len(list(db.query("alice@example.com", index_name="by_email"))) == 1
+
+
+def test_unknown_index(tmp_path):
+    db = Dynafile(tmp_path / "db")
+
+    with pytest.raises(ValueError):
+        db.query("1", index_name="unknown")
+
+
+def test_index_expires_items_of_table(tmp_path):
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl", global_indexes=[BY_EMAIL])
+    db.put_item(item={"PK": "user#1", "SK": "user", "email": "a@example.com", "ttl": 1})
+
+    assert list(db.query("a@example.com", index_name="by_email")) == []
+    assert db.get_item(key={"PK": "user#1", "SK": "user"}) is None
+
+
+def test_index_skips_none_keys(tmp_path):
+    events = []
+    db = Dynafile(tmp_path / "db", global_indexes=[BY_EMAIL, BY_ROLE])
+    db.add_stream_listener(events.append)
+    item = {"PK": "user#1", "SK": "user", "email": None, "role": "admin", "name": None}
+    db.put_item(item=item)
+
+    assert db.get_item(key={"PK": "user#1", "SK": "user"}) == item
+    assert len(events) == 1
+    assert list(db.query("admin", index_name="by_role")) == []
+
+
+@pytest.mark.parametrize("write_buffer_window", [None, 60])
+def test_index_rejects_other_key_types(tmp_path, write_buffer_window):
+    events = []
+    db = Dynafile(
+        tmp_path / "db",
+        global_indexes=[BY_EMAIL],
+        write_buffer_window=write_buffer_window,
+    )
+    db.add_stream_listener(events.append)
+
+    with pytest.raises(ValueError):
+        db.put_item(item={"PK": "user#1", "SK": "user", "email": 3})
+    with pytest.raises(ValueError):
+        db.update_item(key={"PK": "user#1", "SK": "user"}, set={"email": 3})
+
+    assert db.get_item(key={"PK": "user#1", "SK": "user"}) is None
+    assert events == []
+
+
+def test_backfill_skips_other_key_types(tmp_path):
+    with Dynafile(tmp_path / "db").batch_writer() as writer:
+        writer.put_item(item={"PK": "user#1", "SK": "user", "email": 3})
+        writer.put_item(item={"PK": "user#2", "SK": "user", "email": "b@example.com"})
+
+    db = Dynafile(tmp_path / "db", global_indexes=[BY_EMAIL])
+    db.backfill_index("by_email")
+
+    assert len(list(db.query("b@example.com", index_name="by_email"))) == 1
+
+
+def test_failed_index_update_emits_events(tmp_path, monkeypatch):
+    events = []
+    db = Dynafile(tmp_path / "db", global_indexes=[BY_EMAIL], stream_log=True)
+    db.add_stream_listener(events.append)
+
+    def fail(self, changes):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(_IndexTable, "apply", fail)
+
+    with pytest.raises(OSError):
+        db.put_item(item={"PK": "user#1", "SK": "user", "email": "a@example.com"})
+
+    assert db.get_item(key={"PK": "user#1", "SK": "user"})
+    assert len(events) == 1
+    assert len(list(db.read_stream())) == 1
@@ -0,0 +1,130 @@
+import pytest
+
+from dynafile import Dynafile, GlobalSecondaryIndex, LocalSecondaryIndex, _PartitionView
+
+BY_DATE = LocalSecondaryIndex("by_date", sk_attribute="date")
+
+
+def partition_dir(tmp_path):
+    (path,) = (tmp_path / "db" / "_partitions").iterdir()
+    return path
+
+
+@pytest.fixture(params=[False, True], ids=["snapshot", "write_log"])
+def db(request, tmp_path):
+    db = Dynafile(
+        tmp_path / "db",
+        local_indexes=[BY_DATE],
+        write_log=request.param,
+        cache_max_items=100,
+    )
+    with db.batch_writer() as writer:
+        for sk, date in [("a", "2021-03"), ("b", "2021-01"), ("c", "2021-02")]:
+            writer.put_item(item={"PK": "1", "SK": sk, "date": date})
+        writer.put_item(item={"PK": "1", "SK": "d"})
+        writer.put_item(item={"PK": "2", "SK": "a", "date": "2021-01"})
+    return db
+
+
+def sks(items):
+    return [item["SK"] for item in items]
+
+
+def test_query_local_index(db):
+    assert sks(db.query("1", index_name="by_date")) == ["b", "c", "a"]
+    assert sks(db.query("1", index_name="by_date", scan_index_forward=False)) == [
+        "a",
+        "c",
+        "b",
+    ]
+
+
+def test_query_local_index_key_conditions(db):
+    def query(**kwargs):
+        return sks(db.query("1", index_name="by_date", **kwargs))
+
+    assert query(gt="2021-01") == ["c", "a"]
+    assert query(lte="2021-02") == ["b", "c"]
+    assert query(between=("2021-02", "2021-03")) == ["c", "a"]
+    assert query(begins_with="2021-0") == ["b", "c", "a"]
+
+
+def test_local_index_file(db, tmp_path):
+    path = tmp_path / "db" / "_partitions" / Dynafile._hash_key("1")
+    assert (path / "sli-by_date.pickle").exists()
+
+
+def test_local_index_follows_updates_and_deletes(db):
+    db.put_item(item={"PK": "1", "SK": "b", "date": "2021-04"})
+    db.delete_item(key={"PK": "1", "SK": "c"})
+    db.put_item(item={"PK": "1", "SK": "a"})
+
+    assert sks(db.query("1", index_name="by_date")) == ["b"]
+
+
+def test_local_index_pagination(db):
+    page = db.query("1", index_name="by_date", limit=2)
+    assert sks(page) == ["b", "c"]
+    assert page.last_evaluated_key == {"PK": "1", "SK": "c", "date": "2021-02"}
+
+    page = db.query(
+        "1",
+        index_name="by_date",
+        limit=2,
+        exclusive_start_key=page.last_evaluated_key,
+    )
+    assert sks(page) == ["a"]
+    assert page.last_evaluated_key is None
+
+
+def test_missing_local_index_is_rebuilt(tmp_path):
+    Dynafile(tmp_path / "db").put_item(item={"PK": "1", "SK": "a", "date": "2021"})
+
+    db = Dynafile(tmp_path / "db", local_indexes=[BY_DATE])
+    assert sks(db.query("1", index_name="by_date")) == ["a"]
+
+    db.put_item(item={"PK": "1", "SK": "b", "date": "2020"})
+    assert (partition_dir(tmp_path) / "sli-by_date.pickle").exists()
+    assert sks(db.query("1", index_name="by_date")) == ["b", "a"]
+
+
+def test_failed_write_keeps_local_index_consistent(tmp_path):
+    db = Dynafile(tmp_path / "db", local_indexes=[BY_DATE], cache_max_items=100)
+    db.put_item(item={"PK": "1", "SK": "a", "date": "2021"})
+
+    with pytest.raises(TypeError):
+        # index values of different types can not be ordered
+        db.put_item(item={"PK": "1", "SK": "b", "date": 2021})
+
+    assert sks(db.query("1", index_name="by_date")) == ["a"]
+
+
+def test_index_names_are_unique(tmp_path):
+    with pytest.raises(ValueError):
+        Dynafile(
+            tmp_path / "db",
+            global_indexes=[GlobalSecondaryIndex("by_date", pk_attribute="date")],
+            local_indexes=[BY_DATE],
+        )
+
+
+def test_local_index_query_streams_from_snapshot(db, monkeypatch):
+    gets = []
+    original = _PartitionView.get
+    monkeypatch.setattr(
+        _PartitionView,
+        "get",
+        lambda self, key, default=None: (
+            gets.append(key) or original(self, key, default)
+        ),
+    )
+
+    items = db.query("1", index_name="by_date")
+    assert next(items)["SK"] == "b"
+    assert gets == ["b"]
+
+    db.put_item(item={"PK": "1", "SK": "e", "date": "2021-02"})
+    db.delete_item(key={"PK": "1", "SK": "c"})
+
+    assert sks(items) == ["c", "a"]
+    assert sks(db.query("1", index_name="by_date")) == ["b", "e", "a"]
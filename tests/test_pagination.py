@@ -0,0 +1,100 @@
+import pytest
+
+from dynafile import Dynafile
+
+
+def put_items(db, pks, sks):
+    with db.batch_writer() as writer:
+        for pk in pks:
+            for sk in sks:
+                writer.put_item(item={"PK": pk, "SK": sk})
+
+
+def test_query_limit(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    put_items(db, ["1"], ["a", "b", "c"])
+
+    page = db.query("1", limit=2)
+
+    assert [i["SK"] for i in page] == ["a", "b"]
+    assert page.last_evaluated_key == {"PK": "1", "SK": "b"}
+
+
+def test_query_pages(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    put_items(db, ["1"], ["a", "b", "c", "d", "e"])
+
+    pages = []
+    key = None
+    while True:
+        page = db.query("1", limit=2, exclusive_start_key=key)
+        pages.append([i["SK"] for i in page])
+        key = page.last_evaluated_key
+        if key is None:
+            break
+
+    assert pages == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_query_pages_backwards(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    put_items(db, ["1"], ["a", "b", "c"])
+
+    page = db.query("1", limit=2, scan_index_forward=False)
+    assert [i["SK"] for i in page] == ["c", "b"]
+
+    page = db.query(
+        "1",
+        limit=2,
+        scan_index_forward=False,
+        exclusive_start_key=page.last_evaluated_key,
+    )
+    assert [i["SK"] for i in page] == ["a"]
+    assert page.last_evaluated_key is None
+
+
+def test_query_limit_counts_filtered_items(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    put_items(db, ["1"], ["a", "b", "c"])
+
+    page = db.query("1", limit=2, _filter=lambda i: i["SK"] != "a")
+
+    assert [i["SK"] for i in page] == ["b"]
+    assert page.last_evaluated_key == {"PK": "1", "SK": "b"}
+
+
+def test_query_without_limit_has_no_last_evaluated_key(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    put_items(db, ["1"], ["a", "b"])
+
+    page = db.query("1")
+
+    assert len(list(page)) == 2
+    assert page.last_evaluated_key is None
+
+
+def test_scan_pages(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    put_items(db, ["1", "2", "3"], ["a", "b", "c"])
+
+    items = []
+    key = None
+    pages = 0
+    while True:
+        page = db.scan(limit=2, exclusive_start_key=key)
+        items.extend((i["PK"], i["SK"]) for i in page)
+        pages += 1
+        key = page.last_evaluated_key
+        if key is None:
+            break
+
+    assert sorted(items) == [(pk, sk) for pk in "123" for sk in "abc"]
+    assert len(items) == 9
+    assert pages == 5
+
+
+def test_invalid_limit(tmp_path):
+    db = Dynafile(tmp_path / "db")
+
+    with pytest.raises(ValueError):
+        db.query("1", limit=0)
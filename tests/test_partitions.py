@@ -0,0 +1,30 @@
+from dynafile import Dynafile
+
+
+def test_partition_handles_are_reused(tmp_path):
+    db = Dynafile(tmp_path / "db")
+
+    assert db._get_partition("1") is db._get_partition("1")
+    assert db._get_partition("1") is not db._get_partition("2")
+
+
+def test_partition_handles_are_bounded(tmp_path):
+    db = Dynafile(tmp_path / "db", max_partition_handles=2)
+
+    first = db._get_partition("1")
+    db._get_partition("2")
+    db._get_partition("1")
+    db._get_partition("3")
+
+    assert len(db._partitions) == 2
+    assert db._get_partition("1") is first
+    assert db._hash_key("2") not in db._partitions
+
+
+def test_scan_reuses_partition_handles(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1"})
+    partition = db._get_partition("1")
+
+    assert list(db.scan()) == [{"PK": "1", "SK": "1"}]
+    assert list(db._partitions.values()) == [partition]
@@ -1,8 +1,11 @@
+import io
+import time
 import random
 
 import pytest
+from sortedcontainers import SortedDict
 
-from dynafile import Dynafile
+from dynafile import Dynafile, MappedCodec, PickleCodec, RecordCodec
 
 
 @pytest.mark.perf
@@ -61,3 +64,226 @@ def test_perf_batch_put_item_huge_files(tmp_path, benchmark, iterations):
     benchmark.pedantic(
         db.get_item, kwargs=dict(key={"PK": "item-1", "SK": "1"}), rounds=100
     )
+
+
+@pytest.mark.perf
+def test_perf_get_item_huge_files_cached(tmp_path, benchmark):
+    items = [{"PK": "item-1", "SK": str(i), "data": b"0" * 1024} for i in range(1000)]
+
+    db = Dynafile(tmp_path / "db", cache_max_items=10_000)
+
+    with db.batch_writer() as writer:
+        for item in items:
+            writer.put_item(item=item)
+
+    benchmark.pedantic(
+        db.get_item, kwargs=dict(key={"PK": "item-1", "SK": "1"}), rounds=100
+    )
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("write_log", [False, True])
+def test_perf_put_item_huge_files(tmp_path, benchmark, write_log):
+    items = [{"PK": "item-1", "SK": str(i), "data": b"0" * 1024} for i in range(1000)]
+
+    db = Dynafile(tmp_path / "db", cache_max_items=10_000, write_log=write_log)
+
+    with db.batch_writer() as writer:
+        for item in items:
+            writer.put_item(item=item)
+
+    benchmark.pedantic(
+        db.put_item, kwargs=dict(item={"PK": "item-1", "SK": "1"}), rounds=100
+    )
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("max_workers", [None, 4, 16])
+def test_perf_batch_put_item_parallel(tmp_path, benchmark, max_workers):
+    items = [{"PK": f"item-{i // 50}", "SK": str(i)} for i in range(5000)]
+
+    db = Dynafile(tmp_path / "db")
+
+    @benchmark
+    def execute():
+        with db.batch_writer(max_workers=max_workers) as writer:
+            for item in items:
+                writer.put_item(item=item)
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("codec", [PickleCodec(), RecordCodec()], ids=repr)
+@pytest.mark.parametrize("operation", ["load", "save"])
+def test_perf_codec_huge_files(tmp_path, benchmark, codec, operation):
+    items = [{"PK": "item-1", "SK": str(i), "data": b"0" * 1024} for i in range(1000)]
+    tree = SortedDict((item["SK"], item) for item in items)
+
+    file = io.BytesIO()
+    codec.dump(tree, file)
+
+    def load():
+        file.seek(0)
+        return codec.load(file)
+
+    def save():
+        codec.dump(tree, io.BytesIO())
+
+    benchmark(load if operation == "load" else save)
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("codec", [PickleCodec(), RecordCodec()], ids=repr)
+@pytest.mark.parametrize("operation", ["load", "save"])
+def test_perf_codec_many_items(tmp_path, benchmark, codec, operation):
+    items = [{"PK": "item-1", "SK": str(i), "value": i} for i in range(5000)]
+    tree = SortedDict((item["SK"], item) for item in items)
+
+    file = io.BytesIO()
+    codec.dump(tree, file)
+
+    def load():
+        file.seek(0)
+        return codec.load(file)
+
+    def save():
+        codec.dump(tree, io.BytesIO())
+
+    benchmark(load if operation == "load" else save)
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("codec", [PickleCodec(), MappedCodec()], ids=repr)
+def test_perf_get_item_huge_files_codec(tmp_path, benchmark, codec):
+    items = [{"PK": "item-1", "SK": str(i), "data": b"0" * 1024} for i in range(10_000)]
+
+    db = Dynafile(tmp_path / "db", codec=codec)
+
+    with db.batch_writer() as writer:
+        for item in items:
+            writer.put_item(item=item)
+
+    benchmark.pedantic(
+        db.get_item, kwargs=dict(key={"PK": "item-1", "SK": "1"}), rounds=100
+    )
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("bloom_filter", [False, True])
+def test_perf_get_missing_item_huge_files(tmp_path, benchmark, bloom_filter):
+    items = [{"PK": "item-1", "SK": str(i), "data": b"0" * 1024} for i in range(1000)]
+
+    db = Dynafile(tmp_path / "db", bloom_filter=bloom_filter)
+
+    with db.batch_writer() as writer:
+        for item in items:
+            writer.put_item(item=item)
+
+    benchmark.pedantic(
+        db.get_item, kwargs=dict(key={"PK": "item-1", "SK": "missing"}), rounds=100
+    )
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("compression", ["none", "zlib", "lzma"])
+@pytest.mark.parametrize("operation", ["load", "save"])
+def test_perf_compression_huge_files(tmp_path, benchmark, compression, operation):
+    items = [{"PK": "item-1", "SK": str(i), "data": b"0" * 1024} for i in range(1000)]
+
+    db = Dynafile(tmp_path / "db", compression=compression)
+
+    with db.batch_writer() as writer:
+        for item in items:
+            writer.put_item(item=item)
+
+    partition = db._get_partition("item-1")
+    segment = partition._segment("data")
+    tree = segment._load()
+    benchmark.extra_info["bytes"] = segment.size()
+
+    if operation == "load":
+        benchmark(segment._load)
+    else:
+        benchmark(segment._save, tree)
+
+
+@pytest.mark.perf
+def test_perf_scan_expired_items(tmp_path, benchmark):
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl")
+    with db.batch_writer() as writer:
+        for i in range(1000):
+            writer.put_item(item={"PK": "item-1", "SK": str(i), "ttl": 1})
+
+    benchmark(lambda: list(db.scan()))
+
+
+@pytest.mark.perf
+def test_perf_expire_items_few_expired_partitions(tmp_path, benchmark):
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl")
+    with db.batch_writer() as writer:
+        for i in range(1000):
+            writer.put_item(item={"PK": f"item-{i % 100}", "SK": str(i)})
+
+    @benchmark
+    def execute():
+        db.put_item(item={"PK": "item-1", "SK": "expired", "ttl": 1})
+        db.expire_items()
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("stream_queue_size", [None, 10000])
+def test_perf_put_item_slow_stream_listener(tmp_path, benchmark, stream_queue_size):
+    db = Dynafile(tmp_path / "db", stream_queue_size=stream_queue_size)
+    db.add_stream_listener(lambda event: time.sleep(0.001))
+
+    @benchmark
+    def execute():
+        for i in range(100):
+            db.put_item(item={"PK": f"item-{i % 10}", "SK": str(i)})
+
+    db.close()
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("write_buffer_window", [None, 1.0])
+def test_perf_put_item_write_buffer(tmp_path, benchmark, write_buffer_window):
+    db = Dynafile(tmp_path / "db", write_buffer_window=write_buffer_window)
+
+    @benchmark
+    def execute():
+        for i in range(1000):
+            db.put_item(item={"PK": f"item-{i % 10}", "SK": str(i)})
+        db.flush()
+
+    db.close()
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("durability", ["fsync", "atomic-no-fsync", "deferred"])
+@pytest.mark.parametrize("write_log", [False, True])
+def test_perf_put_item_durability(tmp_path, benchmark, durability, write_log):
+    db = Dynafile(tmp_path / "db", durability=durability, write_log=write_log)
+
+    @benchmark
+    def execute():
+        for i in range(100):
+            db.put_item(item={"PK": f"item-{i % 10}", "SK": str(i)})
+
+    db.close()
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("method", ["get_put", "update_item"])
+def test_perf_increment_counter(tmp_path, benchmark, method):
+    db = Dynafile(tmp_path / "db")
+    with db.batch_writer() as writer:
+        for i in range(1000):
+            writer.put_item(item={"PK": "item-1", "SK": str(i), "count": 0})
+    key = {"PK": "item-1", "SK": "500"}
+
+    @benchmark
+    def execute():
+        if method == "update_item":
+            db.update_item(key=key, add={"count": 1})
+        else:
+            item = db.get_item(key=key)
+            db.put_item(item={**item, "count": item["count"] + 1})
@@ -1,3 +1,5 @@
+from sortedcontainers import SortedDict
+
 from dynafile import Dynafile
 
 
@@ -145,3 +147,88 @@ def test_query_with_string_filter_nested(tmp_path):
     items = list(db.query(pk="1", _filter="data.count > 0"))
 
     assert items == [ab]
+
+
+def put_sort_keys(db, sks):
+    for sk in sks:
+        db.put_item(item={"PK": "1", "SK": sk})
+
+
+def test_query_begins_with(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    put_sort_keys(db, ["a", "ab", "aba", "abz", "ac", "b"])
+
+    items = list(db.query(pk="1", begins_with="ab"))
+
+    assert [i["SK"] for i in items] == ["ab", "aba", "abz"]
+
+
+def test_query_begins_with_backwards(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    put_sort_keys(db, ["a", "ab", "aba", "abz", "ac", "b"])
+
+    items = list(db.query(pk="1", begins_with="ab", scan_index_forward=False))
+
+    assert [i["SK"] for i in items] == ["abz", "aba", "ab"]
+
+
+def test_query_between(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    put_sort_keys(db, ["a", "b", "c", "d"])
+
+    items = list(db.query(pk="1", between=("b", "c")))
+
+    assert [i["SK"] for i in items] == ["b", "c"]
+
+
+def test_query_comparisons(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    put_sort_keys(db, ["a", "b", "c", "d"])
+
+    def sks(**kwargs):
+        return [i["SK"] for i in db.query(pk="1", **kwargs)]
+
+    assert sks(lt="c") == ["a", "b"]
+    assert sks(lte="c") == ["a", "b", "c"]
+    assert sks(gt="b") == ["c", "d"]
+    assert sks(gte="b") == ["b", "c", "d"]
+    assert sks(gt="a", lt="d") == ["b", "c"]
+    assert sks(gte="b", gt="b") == ["c", "d"]
+
+
+def test_query_backwards_without_start(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    put_sort_keys(db, ["a", "b", "c"])
+
+    items = list(db.query(pk="1", scan_index_forward=False))
+
+    assert [i["SK"] for i in items] == ["c", "b", "a"]
+
+
+def test_query_reads_only_key_range(tmp_path, monkeypatch):
+    db = Dynafile(tmp_path / "db")
+    put_sort_keys(db, ["a", "ba", "bb", "c"])
+
+    read = []
+    original = SortedDict.__getitem__
+    monkeypatch.setattr(
+        SortedDict, "__getitem__", lambda self, k: read.append(k) or original(self, k)
+    )
+
+    assert len(list(db.query(pk="1", begins_with="b"))) == 2
+    assert read == ["ba", "bb"]
+
+
+def test_query_streams_items(tmp_path, monkeypatch):
+    db = Dynafile(tmp_path / "db")
+    put_sort_keys(db, ["a", "b", "c"])
+
+    read = []
+    original = SortedDict.__getitem__
+    monkeypatch.setattr(
+        SortedDict, "__getitem__", lambda self, k: read.append(k) or original(self, k)
+    )
+
+    items = db.query(pk="1")
+    assert next(items)["SK"] == "a"
+    assert read == ["a"]
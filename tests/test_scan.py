@@ -1,4 +1,7 @@
 from _operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
 
 from dynafile import Dynafile
 
@@ -93,3 +96,55 @@ def test_scan_with_string_filter(tmp_path):
     items = set(map(itemgetter("SK"), db.scan(_filter="SK =~ /^a/")))
 
     assert items == {"aa", "ab", "ac"}
+
+
+def test_scan_segments_are_disjoint_and_complete(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    with db.batch_writer() as writer:
+        for i in range(50):
+            writer.put_item(item={"PK": str(i), "SK": "a"})
+
+    segments = [
+        [item["PK"] for item in db.scan(segment=segment, total_segments=4)]
+        for segment in range(4)
+    ]
+
+    assert sorted(sum(segments, [])) == sorted(str(i) for i in range(50))
+    assert all(segments)
+
+
+def test_scan_invalid_segment(tmp_path):
+    db = Dynafile(tmp_path / "db")
+
+    with pytest.raises(ValueError):
+        db.scan(segment=4, total_segments=4)
+
+    with pytest.raises(ValueError):
+        db.scan(segment=1)
+
+
+def test_parallel_scan(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    with db.batch_writer() as writer:
+        for i in range(50):
+            writer.put_item(item={"PK": str(i), "SK": "a"})
+            writer.put_item(item={"PK": str(i), "SK": "b"})
+
+    items = list(db.parallel_scan(max_workers=2))
+
+    assert len(items) == 100
+    assert set(map(itemgetter("PK"), items)) == {str(i) for i in range(50)}
+
+
+def test_parallel_scan_with_string_filter(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    with db.batch_writer() as writer:
+        for i in range(10):
+            writer.put_item(item={"PK": str(i), "SK": "a"})
+            writer.put_item(item={"PK": str(i), "SK": "b"})
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        items = list(db.parallel_scan("SK =~ /^a/", total_segments=3, executor=pool))
+
+    assert set(map(itemgetter("SK"), items)) == {"a"}
+    assert len(items) == 10
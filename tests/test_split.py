@@ -0,0 +1,113 @@
+import pickle
+
+import pytest
+
+from dynafile import Dynafile, LocalSecondaryIndex
+
+
+def partition_dir(tmp_path, pk="1"):
+    return tmp_path / "db" / "_partitions" / Dynafile._hash_key(pk)
+
+
+def manifest(tmp_path, pk="1"):
+    with (partition_dir(tmp_path, pk) / "manifest.pickle").open("rb") as file:
+        return pickle.load(file)
+
+
+def put_items(db, count, pk="1"):
+    with db.batch_writer() as writer:
+        for i in range(count):
+            writer.put_item(item={"PK": pk, "SK": f"{i:03}", "v": i})
+
+
+def test_partition_splits_by_items(tmp_path):
+    db = Dynafile(tmp_path / "db", split_max_items=10)
+    put_items(db, 11)
+
+    bounds, names = manifest(tmp_path)
+    assert bounds == ["003", "007"]
+    assert not (partition_dir(tmp_path) / "data.pickle").exists()
+    for name in names:
+        assert (partition_dir(tmp_path) / f"{name}.pickle").exists()
+
+    assert [item["v"] for item in db.query("1")] == list(range(11))
+
+
+def test_partition_splits_by_bytes(tmp_path):
+    db = Dynafile(tmp_path / "db", split_max_bytes=1000)
+    for i in range(4):
+        db.put_item(item={"PK": "1", "SK": str(i), "data": b"0" * 400})
+
+    bounds, names = manifest(tmp_path)
+    assert len(names) > 1
+    assert len(list(db.query("1"))) == 4
+
+
+def test_split_partition_is_readable_without_thresholds(tmp_path):
+    put_items(Dynafile(tmp_path / "db", split_max_items=4), 20)
+
+    db = Dynafile(tmp_path / "db")
+    assert [item["v"] for item in db.query("1")] == list(range(20))
+    assert [item["v"] for item in db.query("1", scan_index_forward=False)] == list(
+        reversed(range(20))
+    )
+    assert db.get_item(key={"PK": "1", "SK": "013"})["v"] == 13
+    assert len(list(db.scan())) == 20
+
+
+@pytest.mark.parametrize("write_log", [False, True], ids=["snapshot", "write_log"])
+def test_writes_touch_owning_segment_only(tmp_path, write_log):
+    db = Dynafile(tmp_path / "db", split_max_items=10, write_log=write_log)
+    put_items(db, 11)
+    bounds, names = manifest(tmp_path)
+    lower = partition_dir(tmp_path) / f"{names[0]}.pickle"
+    lower_mtime = lower.stat().st_mtime_ns
+
+    db.put_item(item={"PK": "1", "SK": "009", "v": "updated"})
+    db.delete_item(key={"PK": "1", "SK": "010"})
+
+    assert lower.stat().st_mtime_ns == lower_mtime
+    assert db.get_item(key={"PK": "1", "SK": "009"})["v"] == "updated"
+    assert db.get_item(key={"PK": "1", "SK": "010"}) is None
+
+
+def test_query_loads_overlapping_segments_only(tmp_path, loads):
+    db = Dynafile(tmp_path / "db", split_max_items=4)
+    put_items(db, 20)
+    _, names = manifest(tmp_path)
+    assert len(names) > 2
+    loads.clear()
+
+    assert [item["v"] for item in db.query("1", between=("004", "005"))] == [4, 5]
+    assert len(loads) == 1
+
+
+def test_segments_split_repeatedly(tmp_path):
+    db = Dynafile(tmp_path / "db", split_max_items=4)
+    for i in range(30):
+        db.put_item(item={"PK": "1", "SK": f"{i:03}"})
+
+    bounds, names = manifest(tmp_path)
+    assert bounds == sorted(bounds)
+    assert len(set(names)) == len(names) > 4
+    assert sorted(path.name for path in partition_dir(tmp_path).iterdir()) == sorted(
+        [f"{name}.pickle" for name in names] + ["manifest.pickle"]
+    )
+    assert [item["SK"] for item in db.query("1")] == [f"{i:03}" for i in range(30)]
+
+
+def test_local_index_spans_segments(tmp_path):
+    db = Dynafile(
+        tmp_path / "db",
+        split_max_items=4,
+        local_indexes=[LocalSecondaryIndex("by_v", sk_attribute="neg")],
+    )
+    with db.batch_writer() as writer:
+        for i in range(12):
+            writer.put_item(item={"PK": "1", "SK": f"{i:03}", "neg": -i})
+
+    assert [item["neg"] for item in db.query("1", index_name="by_v", lt=-8)] == [
+        -11,
+        -10,
+        -9,
+    ]
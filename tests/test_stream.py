@@ -0,0 +1,155 @@
+import threading
+
+import pytest
+
+from dynafile import Dynafile, Event, _Segment
+
+
+def test_failed_write_emits_no_event(tmp_path, monkeypatch):
+    events = []
+    db = Dynafile(tmp_path / "db")
+    db.add_stream_listener(events.append)
+
+    def fail(self, data, changes):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(_Segment, "store", fail)
+
+    with pytest.raises(OSError):
+        db.put_item(item={"PK": "1", "SK": "1"})
+
+    assert events == []
+
+
+def test_buffered_stream_does_not_block_writes(tmp_path):
+    release = threading.Event()
+    events = []
+
+    def slow_listener(event: Event):
+        release.wait()
+        events.append(event)
+
+    db = Dynafile(tmp_path / "db", stream_queue_size=100)
+    db.add_stream_listener(slow_listener)
+
+    for i in range(10):
+        db.put_item(item={"PK": "1", "SK": str(i)})
+    assert len(events) == 0
+
+    release.set()
+    db.flush_stream()
+
+    assert [event.new["SK"] for event in events] == [str(i) for i in range(10)]
+    db.close()
+
+
+def test_buffered_stream_delivers_in_batches(tmp_path):
+    threads = set()
+    db = Dynafile(tmp_path / "db", stream_queue_size=10, stream_batch_size=3)
+    db.add_stream_listener(lambda event: threads.add(threading.current_thread()))
+
+    with db.batch_writer() as writer:
+        for i in range(20):
+            writer.put_item(item={"PK": str(i % 3), "SK": str(i)})
+    db.close()
+
+    assert len(threads) == 1
+    assert threading.current_thread() not in threads
+
+
+def test_buffered_stream_listener_writes_to_full_queue(tmp_path):
+    db = Dynafile(tmp_path / "db", stream_queue_size=1, stream_batch_size=1)
+    events = []
+
+    def listener(event: Event):
+        events.append(event)
+        if not event.new["SK"].startswith("copy"):
+            for copy in ("copy-a", "copy-b"):
+                db.put_item(item={"PK": "1", "SK": copy + event.new["SK"]})
+
+    db.add_stream_listener(listener)
+
+    def write():
+        for i in range(20):
+            db.put_item(item={"PK": "1", "SK": str(i)})
+        db.close()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    writer.join(timeout=10)
+
+    assert not writer.is_alive()
+    assert len(events) == 60
+
+
+def test_buffered_stream_reports_listener_errors(tmp_path):
+    events = []
+
+    def failing_listener(event: Event):
+        raise ValueError("boom")
+
+    db = Dynafile(tmp_path / "db", stream_queue_size=10)
+    db.add_stream_listener(failing_listener)
+    db.add_stream_listener(events.append)
+
+    with pytest.warns(UserWarning, match="boom"):
+        db.put_item(item={"PK": "1", "SK": "1"})
+        db.close()
+
+    assert len(events) == 1
+
+
+def test_stream_log_records_changes(tmp_path):
+    db = Dynafile(tmp_path / "db", stream_log=True)
+    db.put_item(item={"PK": "1", "SK": "1", "v": 1})
+    db.put_item(item={"PK": "1", "SK": "1", "v": 2})
+    db.delete_item(key={"PK": "1", "SK": "1"})
+    db.put_item(item={"PK": "2", "SK": "1"})
+
+    records = list(Dynafile(tmp_path / "db").read_stream())
+
+    shard = Dynafile._hash_key("1")
+    assert [r.event for r in records if r.shard == shard] == [
+        Event(action="PUT", new={"PK": "1", "SK": "1", "v": 1}, old=None),
+        Event(
+            action="PUT",
+            new={"PK": "1", "SK": "1", "v": 2},
+            old={"PK": "1", "SK": "1", "v": 1},
+        ),
+        Event(action="DELETE", new=None, old={"PK": "1", "SK": "1", "v": 2}),
+    ]
+    assert len(records) == 4
+
+
+def test_stream_log_resumes_from_checkpoint(tmp_path):
+    db = Dynafile(tmp_path / "db", stream_log=True)
+    for i in range(3):
+        db.put_item(item={"PK": str(i % 2), "SK": str(i)})
+
+    checkpoint = {}
+    for record in db.read_stream():
+        checkpoint[record.shard] = record.sequence
+
+    db.put_item(item={"PK": "0", "SK": "new"})
+    db.put_item(item={"PK": "2", "SK": "new"})
+
+    records = list(db.read_stream(checkpoint))
+    assert sorted(r.event.new["PK"] for r in records) == ["0", "2"]
+
+    checkpoint.update((r.shard, r.sequence) for r in records)
+    assert list(db.read_stream(checkpoint)) == []
+
+
+def test_stream_log_recovers_from_incomplete_record(tmp_path):
+    db = Dynafile(tmp_path / "db", stream_log=True)
+    db.put_item(item={"PK": "1", "SK": "1"})
+
+    log = tmp_path / "db" / "_partitions" / Dynafile._hash_key("1") / "stream.log"
+    with log.open("ab") as file:
+        file.write(b"\x00\x00\x00\x00\x00\x00\x01\x00incomplete")
+
+    assert len(list(db.read_stream())) == 1
+
+    db.put_item(item={"PK": "1", "SK": "2"})
+
+    assert [r.event.new["SK"] for r in db.read_stream()] == ["1", "2"]
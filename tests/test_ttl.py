@@ -1,8 +1,9 @@
 import datetime
+import time
 
 import time_machine
 
-from dynafile import Dynafile
+from dynafile import Dynafile, GlobalSecondaryIndex
 
 
 @time_machine.travel(datetime.datetime.now(), tick=False)
@@ -20,7 +21,7 @@ def test_ttl_keep_living_items(tmp_path):
 
 
 @time_machine.travel(datetime.datetime.now(), tick=False)
-def test_ttl_removes_expired_items_during_scan(tmp_path):
+def test_ttl_hides_expired_items_during_scan(tmp_path):
     now = datetime.datetime.now()
 
     item = {"PK": "1", "SK": "2", "ttl": now.timestamp() - 1000}
@@ -32,7 +33,7 @@ def test_ttl_removes_expired_items_during_scan(tmp_path):
 
 
 @time_machine.travel(datetime.datetime.now(), tick=False)
-def test_ttl_removes_expired_items_during_get(tmp_path):
+def test_ttl_hides_expired_items_during_get(tmp_path):
     now = datetime.datetime.now()
 
     item = {"PK": "1", "SK": "2", "ttl": now.timestamp() - 1000}
@@ -44,7 +45,7 @@ def test_ttl_removes_expired_items_during_get(tmp_path):
 
 
 @time_machine.travel(datetime.datetime.now(), tick=False)
-def test_ttl_removes_expired_items_during_query(tmp_path):
+def test_ttl_hides_expired_items_during_query(tmp_path):
     now = datetime.datetime.now()
 
     item = {"PK": "1", "SK": "2", "ttl": now.timestamp() - 1000}
@@ -55,7 +56,117 @@ def test_ttl_removes_expired_items_during_query(tmp_path):
     assert not list(db.query(item["PK"]))
 
 
+@time_machine.travel(datetime.datetime.now(), tick=False)
+def test_ttl_reads_do_not_write(tmp_path):
+    now = datetime.datetime.now()
+
+    item = {"PK": "1", "SK": "2", "ttl": now.timestamp() - 1000}
+
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl")
+    db.put_item(item=item)
+    list(db.scan())
+    db.get_item(key=item)
+
+    assert Dynafile(tmp_path / "db").get_item(key=item) == item
+
+
 def test_issue_1_get_not_existing_item_works_as_before(tmp_path):
     db = Dynafile(tmp_path / "db", ttl_attribute="ttl")
     item = db.get_item(key={"PK": "does", "SK": "not exist"})
     assert item is None
+
+
+@time_machine.travel(datetime.datetime.now(), tick=False)
+def test_expire_items_deletes_expired_items(tmp_path):
+    now = datetime.datetime.now().timestamp()
+    events = []
+
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl")
+    db.add_stream_listener(events.append)
+    with db.batch_writer() as writer:
+        for i in range(1, 10):
+            writer.put_item(item={"PK": str(i % 2), "SK": str(i), "ttl": now - i})
+        writer.put_item(item={"PK": "0", "SK": "alive", "ttl": now + 1000})
+        writer.put_item(item={"PK": "1", "SK": "forever"})
+    events.clear()
+
+    assert db.expire_items() == 9
+    assert len(events) == 9
+
+    plain = Dynafile(tmp_path / "db")
+    assert sorted(item["SK"] for item in plain.scan()) == ["alive", "forever"]
+
+
+@time_machine.travel(datetime.datetime.now(), tick=False)
+def test_expire_items_skips_partitions_without_expired_items(tmp_path, loads):
+    now = datetime.datetime.now().timestamp()
+
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl")
+    db.put_item(item={"PK": "1", "SK": "1", "ttl": now + 1000})
+    db.put_item(item={"PK": "2", "SK": "1"})
+    db.put_item(item={"PK": "3", "SK": "1", "ttl": now - 1000})
+    loads.clear()
+
+    assert db.expire_items() == 1
+    assert len(loads) == 1
+
+    # the sweep records the exact bound
+    loads.clear()
+    assert db.expire_items() == 0
+    assert loads == []
+
+
+@time_machine.travel(datetime.datetime.now(), tick=False)
+def test_expire_items_tightens_bound_after_deletes(tmp_path):
+    now = datetime.datetime.now().timestamp()
+
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl")
+    db.put_item(item={"PK": "1", "SK": "1", "ttl": now + 10})
+    db.put_item(item={"PK": "1", "SK": "2", "ttl": now + 1000})
+    db.delete_item(key={"PK": "1", "SK": "1"})
+
+    with time_machine.travel(now + 100, tick=False):
+        assert db.expire_items() == 0
+        assert db.get_item(key={"PK": "1", "SK": "2"})
+
+    with time_machine.travel(now + 2000, tick=False):
+        assert db.expire_items() == 1
+
+
+@time_machine.travel(datetime.datetime.now(), tick=False)
+def test_expire_items_sweeps_partitions_without_recorded_bound(tmp_path):
+    now = datetime.datetime.now().timestamp()
+
+    # written without TTL, expiry is not tracked
+    Dynafile(tmp_path / "db").put_item(item={"PK": "1", "SK": "1", "ttl": now - 1})
+
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl")
+    assert db.expire_items() == 1
+    assert list(Dynafile(tmp_path / "db").scan()) == []
+
+
+@time_machine.travel(datetime.datetime.now(), tick=False)
+def test_expire_items_updates_global_indexes(tmp_path):
+    now = datetime.datetime.now().timestamp()
+    by_email = GlobalSecondaryIndex(name="by_email", pk_attribute="email")
+
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl", global_indexes=[by_email])
+    db.put_item(item={"PK": "1", "SK": "1", "email": "a", "ttl": now - 1})
+
+    assert db.expire_items() == 1
+
+    plain = Dynafile(tmp_path / "db", global_indexes=[by_email])
+    assert list(plain.query("a", index_name="by_email")) == []
+
+
+def test_ttl_sweep_interval_deletes_in_background(tmp_path):
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl", ttl_sweep_interval=0.01)
+    db.put_item(item={"PK": "1", "SK": "1", "ttl": time.time() - 1})
+
+    plain = Dynafile(tmp_path / "db")
+    deadline = time.time() + 5
+    while list(plain.scan()) and time.time() < deadline:
+        time.sleep(0.01)
+    db.close()
+
+    assert list(plain.scan()) == []
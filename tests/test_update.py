@@ -0,0 +1,132 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import time_machine
+
+from dynafile import Dynafile, Event, GlobalSecondaryIndex, UpdateResult, _Segment
+
+
+def test_update_sets_and_removes_attributes(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1", "name": "Bob", "tmp": True})
+
+    result = db.update_item(
+        key={"PK": "1", "SK": "1"}, set={"name": "Alice", "age": 3}, remove=["tmp"]
+    )
+
+    assert result == UpdateResult(
+        old={"PK": "1", "SK": "1", "name": "Bob", "tmp": True},
+        new={"PK": "1", "SK": "1", "name": "Alice", "age": 3},
+    )
+    assert db.get_item(key={"PK": "1", "SK": "1"}) == result.new
+
+
+def test_update_creates_missing_item(tmp_path):
+    db = Dynafile(tmp_path / "db")
+
+    result = db.update_item(key={"PK": "1", "SK": "1"}, add={"count": 1})
+
+    assert result == UpdateResult(old=None, new={"PK": "1", "SK": "1", "count": 1})
+
+
+def test_update_adds_numbers_and_merges_sets(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1", "count": 1, "tags": {"a"}})
+
+    result = db.update_item(
+        key={"PK": "1", "SK": "1"}, add={"count": 2.5, "tags": {"b"}}
+    )
+
+    assert result.new == {"PK": "1", "SK": "1", "count": 3.5, "tags": {"a", "b"}}
+
+
+def test_update_rejects_invalid_updates(tmp_path):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1", "name": "Bob"})
+
+    with pytest.raises(ValueError):
+        db.update_item(key={"PK": "1", "SK": "1"}, set={"SK": "2"})
+    with pytest.raises(ValueError):
+        db.update_item(key={"PK": "1", "SK": "1"}, set={"a": 1}, add={"a": 1})
+    with pytest.raises(TypeError):
+        db.update_item(key={"PK": "1", "SK": "1"}, add={"name": 1})
+
+    assert db.get_item(key={"PK": "1", "SK": "1"}) == {
+        "PK": "1",
+        "SK": "1",
+        "name": "Bob",
+    }
+
+
+def test_update_emits_one_event(tmp_path):
+    events = []
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1", "count": 1})
+    db.add_stream_listener(events.append)
+
+    db.update_item(key={"PK": "1", "SK": "1"}, add={"count": 1})
+
+    assert events == [
+        Event(
+            action="PUT",
+            new={"PK": "1", "SK": "1", "count": 2},
+            old={"PK": "1", "SK": "1", "count": 1},
+        )
+    ]
+
+
+def test_update_loads_and_saves_partition_once(tmp_path, monkeypatch):
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "1", "count": 1})
+
+    calls = []
+    for name in ["_load", "store"]:
+        original = getattr(_Segment, name)
+        monkeypatch.setattr(
+            _Segment,
+            name,
+            lambda self, *args, _name=name, _original=original: (
+                calls.append(_name) or _original(self, *args)
+            ),
+        )
+
+    db.update_item(key={"PK": "1", "SK": "1"}, add={"count": 1})
+
+    assert calls == ["_load", "store"]
+
+
+def test_update_counters_concurrently(tmp_path):
+    db = Dynafile(tmp_path / "db")
+
+    def increment(_):
+        Dynafile(tmp_path / "db").update_item(
+            key={"PK": "1", "SK": "1"}, add={"count": 1}
+        )
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(increment, range(100)))
+
+    assert db.get_item(key={"PK": "1", "SK": "1"})["count"] == 100
+
+
+def test_update_updates_global_index(tmp_path):
+    by_email = GlobalSecondaryIndex(name="by_email", pk_attribute="email")
+    db = Dynafile(tmp_path / "db", global_indexes=[by_email])
+    db.put_item(item={"PK": "1", "SK": "1", "email": "a"})
+
+    db.update_item(key={"PK": "1", "SK": "1"}, set={"email": "b"})
+
+    assert list(db.query("a", index_name="by_email")) == []
+    assert [item["PK"] for item in db.query("b", index_name="by_email")] == ["1"]
+
+
+@time_machine.travel(datetime.datetime.now(), tick=False)
+def test_update_treats_expired_items_as_missing(tmp_path):
+    now = datetime.datetime.now().timestamp()
+    db = Dynafile(tmp_path / "db", ttl_attribute="ttl")
+    db.put_item(item={"PK": "1", "SK": "1", "count": 5, "ttl": now - 1000})
+
+    result = db.update_item(key={"PK": "1", "SK": "1"}, add={"count": 1})
+
+    assert result == UpdateResult(old=None, new={"PK": "1", "SK": "1", "count": 1})
@@ -0,0 +1,163 @@
+import threading
+import time
+
+import pytest
+
+from dynafile import (
+    Action,
+    ActionType,
+    BatchWriteError,
+    Dynafile,
+    _Partition,
+    _Segment,
+)
+
+
+def test_buffered_writes_are_written_on_flush(tmp_path, stores):
+    db = Dynafile(tmp_path / "db", write_buffer_window=60)
+    for i in range(100):
+        db.put_item(item={"PK": str(i % 2), "SK": str(i)})
+    db.delete_item(key={"PK": "0", "SK": "0"})
+
+    other = Dynafile(tmp_path / "db")
+    assert list(other.scan()) == []
+    assert stores == []
+
+    db.flush()
+
+    assert len(stores) == 2
+    assert len(list(other.scan())) == 99
+    db.close()
+
+
+def test_reads_see_buffered_writes(tmp_path):
+    with Dynafile(tmp_path / "db", write_buffer_window=60) as db:
+        db.put_item(item={"PK": "1", "SK": "1"})
+        assert db.get_item(key={"PK": "1", "SK": "1"}) == {"PK": "1", "SK": "1"}
+
+        db.put_item(item={"PK": "1", "SK": "2"})
+        assert [item["SK"] for item in db.query("1")] == ["1", "2"]
+
+        db.put_item(item={"PK": "2", "SK": "1"})
+        assert len(list(db.scan())) == 3
+
+
+def test_close_writes_buffered_items(tmp_path):
+    with Dynafile(tmp_path / "db", write_buffer_window=60) as db:
+        db.put_item(item={"PK": "1", "SK": "1"})
+
+    assert Dynafile(tmp_path / "db").get_item(key={"PK": "1", "SK": "1"})
+
+
+def test_buffered_items_are_copied(tmp_path):
+    with Dynafile(tmp_path / "db", write_buffer_window=60) as db:
+        item = {"PK": "1", "SK": "1", "v": 1}
+        db.put_item(item=item)
+        item["v"] = 2
+
+        key = {"PK": "2", "SK": "1"}
+        db.put_item(item=dict(key))
+        db.flush()
+        db.delete_item(key=key)
+        key["SK"] = "2"
+
+    other = Dynafile(tmp_path / "db")
+    assert other.get_item(key={"PK": "1", "SK": "1"})["v"] == 1
+    assert other.get_item(key={"PK": "2", "SK": "1"}) is None
+
+
+def test_max_items_trigger_write(tmp_path, stores):
+    db = Dynafile(tmp_path / "db", write_buffer_window=60, write_buffer_max_items=10)
+    for i in range(25):
+        db.put_item(item={"PK": "1", "SK": str(i)})
+
+    assert [len(changes) for changes in stores] == [10, 10]
+    db.close()
+
+
+def test_window_triggers_write(tmp_path):
+    db = Dynafile(tmp_path / "db", write_buffer_window=0.01)
+    db.put_item(item={"PK": "1", "SK": "1"})
+
+    other = Dynafile(tmp_path / "db")
+    deadline = time.time() + 5
+    while other.get_item(key={"PK": "1", "SK": "1"}) is None:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    db.close()
+
+
+def test_batches_keep_order_with_buffered_writes(tmp_path):
+    with Dynafile(tmp_path / "db", write_buffer_window=60) as db:
+        db.put_item(item={"PK": "1", "SK": "1", "v": 1})
+        db.execute_batch([Action(ActionType.PUT, {"PK": "1", "SK": "1", "v": 2})])
+
+    assert Dynafile(tmp_path / "db").get_item(key={"PK": "1", "SK": "1"})["v"] == 2
+
+
+def test_failed_writes_are_raised_on_flush(tmp_path, monkeypatch):
+    db = Dynafile(tmp_path / "db", write_buffer_window=60)
+    db.put_item(item={"PK": "1", "SK": "1"})
+
+    def fail(self, data, changes):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(_Segment, "store", fail)
+
+    with pytest.raises(BatchWriteError) as e:
+        db.flush()
+
+    assert list(e.value.errors) == ["1"]
+
+
+def test_reads_wait_for_running_flush(tmp_path, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    original = _Partition.execute_write_batch
+
+    def slow(self, actions):
+        started.set()
+        release.wait(5)
+        original(self, actions)
+
+    monkeypatch.setattr(_Partition, "execute_write_batch", slow)
+
+    with Dynafile(tmp_path / "db", write_buffer_window=0.05) as db:
+        db.put_item(item={"PK": "1", "SK": "1"})
+        assert started.wait(5)
+
+        results = []
+        reader = threading.Thread(
+            target=lambda: results.append(db.get_item(key={"PK": "1", "SK": "1"}))
+        )
+        reader.start()
+        reader.join(timeout=0.1)
+        assert reader.is_alive()
+
+        release.set()
+        reader.join(timeout=5)
+        assert results == [{"PK": "1", "SK": "1"}]
+        assert list(db.query("1")) == [{"PK": "1", "SK": "1"}]
+
+
+def test_listener_writes_during_flush(tmp_path):
+    db = Dynafile(tmp_path / "db", write_buffer_window=60, write_buffer_max_items=2)
+    seen = []
+
+    def listener(event):
+        seen.append(db.get_item(key={"PK": "1", "SK": event.new["SK"]}))
+        if not event.new["SK"].startswith("copy"):
+            db.put_item(item={"PK": "1", "SK": "copy-a" + event.new["SK"]})
+            db.put_item(item={"PK": "1", "SK": "copy-b" + event.new["SK"]})
+            db.flush()
+
+    db.add_stream_listener(listener)
+    db.put_item(item={"PK": "1", "SK": "1"})
+
+    flush = threading.Thread(target=db.close)
+    flush.start()
+    flush.join(timeout=5)
+
+    assert not flush.is_alive()
+    assert len(seen) == 3
+    assert None not in seen
+    assert len(list(Dynafile(tmp_path / "db").query("1"))) == 3
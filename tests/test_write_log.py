@@ -0,0 +1,104 @@
+import pytest
+
+from dynafile import Dynafile
+
+
+def partition_dir(tmp_path):
+    (path,) = (tmp_path / "db" / "_partitions").iterdir()
+    return path
+
+
+def test_write_log_appends_changes(tmp_path):
+    db = Dynafile(tmp_path / "db", write_log=True)
+
+    db.put_item(item={"PK": "1", "SK": "1"})
+    db.put_item(item={"PK": "1", "SK": "2"})
+    db.delete_item(key={"PK": "1", "SK": "1"})
+
+    path = partition_dir(tmp_path)
+    assert (path / "data.log").exists()
+    assert not (path / "data.pickle").exists()
+
+    assert db.get_item(key={"PK": "1", "SK": "1"}) is None
+    assert db.get_item(key={"PK": "1", "SK": "2"}) == {"PK": "1", "SK": "2"}
+
+
+def test_write_log_is_persistent(tmp_path):
+    db1 = Dynafile(tmp_path / "db", write_log=True)
+    db1.put_item(item={"PK": "1", "SK": "1", "name": "Dynafile"})
+
+    db2 = Dynafile(tmp_path / "db")
+    assert db2.get_item(key={"PK": "1", "SK": "1"})["name"] == "Dynafile"
+    assert list(db2.scan()) == [{"PK": "1", "SK": "1", "name": "Dynafile"}]
+
+
+def test_write_log_compaction_by_records(tmp_path):
+    db = Dynafile(tmp_path / "db", write_log=True, log_max_records=3)
+
+    db.put_item(item={"PK": "1", "SK": "1"})
+    db.put_item(item={"PK": "1", "SK": "2"})
+    path = partition_dir(tmp_path)
+    assert (path / "data.log").exists()
+
+    db.put_item(item={"PK": "1", "SK": "3"})
+    assert not (path / "data.log").exists()
+    assert (path / "data.pickle").exists()
+
+    assert [item["SK"] for item in db.query("1")] == ["1", "2", "3"]
+
+
+def test_write_log_compaction_by_bytes(tmp_path):
+    db = Dynafile(tmp_path / "db", write_log=True, log_max_bytes=1000)
+
+    db.put_item(item={"PK": "1", "SK": "1", "data": b"0" * 1024})
+    path = partition_dir(tmp_path)
+    assert (path / "data.log").exists()
+
+    db.put_item(item={"PK": "1", "SK": "2"})
+    assert not (path / "data.log").exists()
+    assert len(list(db.query("1"))) == 2
+
+
+def test_write_log_folded_by_snapshot_writes(tmp_path):
+    Dynafile(tmp_path / "db", write_log=True).put_item(item={"PK": "1", "SK": "1"})
+
+    db = Dynafile(tmp_path / "db")
+    db.put_item(item={"PK": "1", "SK": "2"})
+
+    path = partition_dir(tmp_path)
+    assert not (path / "data.log").exists()
+    assert len(list(db.query("1"))) == 2
+
+
+def test_write_log_ignores_incomplete_record(tmp_path):
+    db = Dynafile(tmp_path / "db", write_log=True)
+    db.put_item(item={"PK": "1", "SK": "1"})
+    db.put_item(item={"PK": "1", "SK": "2"})
+
+    log = partition_dir(tmp_path) / "data.log"
+    log.write_bytes(log.read_bytes()[:-3])
+
+    with pytest.warns(UserWarning):
+        assert db.get_item(key={"PK": "1", "SK": "2"}) is None
+        assert db.get_item(key={"PK": "1", "SK": "1"}) is not None
+
+    # next write compacts the log
+    with pytest.warns(UserWarning):
+        db.put_item(item={"PK": "1", "SK": "3"})
+    assert not log.exists()
+    assert len(list(db.query("1"))) == 2
+
+
+def test_write_log_with_cache(tmp_path):
+    db = Dynafile(tmp_path / "db", write_log=True, cache_max_items=100)
+
+    db.put_item(item={"PK": "1", "SK": "1"})
+    db.put_item(item={"PK": "1", "SK": "2"})
+
+    assert db.get_item(key={"PK": "1", "SK": "2"}) is not None
+    assert db.cache_info().misses == 0
+
+    other = Dynafile(tmp_path / "db", write_log=True)
+    other.put_item(item={"PK": "1", "SK": "3"})
+
+    assert db.get_item(key={"PK": "1", "SK": "3"}) is not None